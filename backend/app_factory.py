@@ -0,0 +1,104 @@
+"""The Flask app shared by the web process and the Celery workers.
+
+`create_app` sets up the configuration, database, cache, session hooks and
+Celery, but no endpoints: `app.py` adds those for the web process, so
+workers never import the views and what they pull in.
+"""
+import os
+from dotenv import load_dotenv
+
+# Modules read their settings from the environment when imported
+load_dotenv()
+
+from flask import Flask
+from datetime import timedelta
+
+# Import database, stuff
+from database.models import db
+from database.engine import database_uri, engine_options, sqlite_pragmas, configure_engine
+from asset_urls import OFFLOAD_MODES
+from celery_config import init_celery
+from cache import cache
+from redis_pool import redis_client
+
+
+def create_app():
+    """Build the Flask app without its views."""
+    # No static route: uploads are served by /assets, which keeps resumes out of reach
+    app = Flask(__name__, static_folder=None)
+
+    # Database Config
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'hsa.sqlite3')
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(db_path)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLITE_PRAGMAS'] = sqlite_pragmas()
+
+    # JWT config
+    app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'someSecretKey')
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=15)
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
+
+    # Redis cache config: a client instead of an address makes it borrow from the shared pool
+    app.config['CACHE_TYPE'] = 'redis'
+    app.config['CACHE_REDIS_HOST'] = redis_client
+
+    cache.init_app(app)
+
+    app.config['OLA_API_KEY'] = os.environ.get('OLA_API_KEY')
+
+    # Export files location and lifetime of their download links
+    app.config['EXPORT_FOLDER'] = os.environ.get('EXPORT_FOLDER', '/database/export_files')
+    app.config['EXPORT_LINK_MAX_AGE'] = int(os.environ.get('EXPORT_LINK_MAX_AGE', 60 * 60 * 24))
+
+    # Public address of the API, used for links sent by email
+    app.config['BACKEND_URL'] = os.environ.get('BACKEND_URL', 'http://localhost:5000')
+
+    # Uploaded files: public base of their links, and optionally who sends the bytes (x-sendfile | x-accel-redirect)
+    app.config['ASSET_BASE_URL'] = os.environ.get('ASSET_BASE_URL', app.config['BACKEND_URL'])
+    app.config['ASSET_OFFLOAD'] = os.environ.get('ASSET_OFFLOAD', '').lower()
+    app.config['ASSET_ACCEL_PREFIX'] = os.environ.get('ASSET_ACCEL_PREFIX', '/protected-uploads')
+    if app.config['ASSET_OFFLOAD'] and app.config['ASSET_OFFLOAD'] not in OFFLOAD_MODES:
+        raise ValueError(f"ASSET_OFFLOAD must be one of {', '.join(OFFLOAD_MODES)}")
+    app.config['USE_X_SENDFILE'] = app.config['ASSET_OFFLOAD'] == 'x-sendfile'
+
+    # Largest request body accepted; bigger uploads are refused with 413 before being read
+    app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+
+    # Initialize database
+    db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config['SQLITE_PRAGMAS'])
+
+    # Session hooks that keep the caches and the Redis indexes in step with
+    # committed writes, which workers make too
+    import catalog_cache, dashboard_cache, identity, serviceability  # noqa: F401
+
+    # Tasks run inside this app's context
+    init_celery(app)
+
+    register_commands(app)
+    return app
+
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the tables and indexes that don't exist yet and seed the counters."""
+        from database.schema import sync_schema
+        sync_schema()
+        print("Database schema is up to date")
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats():
+        """Recount the dashboard counters from the source tables."""
+        from database.models import ServiceStats
+        stats = ServiceStats.rebuild()
+        print(f"Rebuilt service stats: {stats.total_requests} requests, {stats.total_users} users")
+
+    @app.cli.command('rebuild-serviceability')
+    def rebuild_serviceability():
+        """Recreate the (category, pincode) serviceability index in Redis."""
+        from serviceability import rebuild_index
+        count = rebuild_index()
+        print(f"Indexed {count} serving professional addresses")
+
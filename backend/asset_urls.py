@@ -0,0 +1,38 @@
+"""Paths and public URLs of uploaded files.
+
+Only depends on Flask's `current_app` for `ASSET_BASE_URL`, so models and
+serializers can build links without importing the `/assets` blueprint in
+`assets.py` (and everything the views pull in).
+"""
+import os
+import re
+from urllib.parse import quote
+
+from flask import current_app
+
+UPLOAD_PREFIX = 'static/uploads/'
+OFFLOAD_MODES = ('x-sendfile', 'x-accel-redirect')
+
+# <sha256>.<ext>, or a resized variant <sha256>_<width>.<ext>
+_FINGERPRINTED = re.compile(r'^[0-9a-f]{64}(_\d+)?\.[A-Za-z0-9]+$')
+
+
+def upload_path(path):
+    """Stored upload path with forward slashes; older rows were saved with Windows separators."""
+    return path.replace('\\', '/') if path else path
+
+def uploads_relative(path):
+    """Stored file path relative to static/uploads, or None if it lives elsewhere."""
+    path = upload_path(path)
+    return path[len(UPLOAD_PREFIX):] if path.startswith(UPLOAD_PREFIX) else None
+
+def asset_url(path):
+    """Public URL of a stored file path such as 'static/uploads/services/<name>'."""
+    base = current_app.config['ASSET_BASE_URL'].rstrip('/')
+    relative = uploads_relative(path)
+    if relative is not None:
+        return f'{base}/assets/{quote(relative)}'
+    return f'{base}/{quote(upload_path(path))}'
+
+def is_fingerprinted(filename):
+    return bool(_FINGERPRINTED.match(os.path.basename(filename)))
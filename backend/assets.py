@@ -0,0 +1,84 @@
+"""Uploaded files (service images, resumes) with long-lived cache headers.
+
+Links (`asset_urls.asset_url`) are built from `ASSET_BASE_URL`, so a CDN or
+the front proxy can serve them from another host, and point at
+`/assets/<path>` under `static/uploads`.
+Only the public folders in `PUBLIC_FOLDERS` are served there; resumes are
+only sent to admins, through `send_upload` with `private=True`.
+Files named after the SHA-256 of their content (and their resized variants)
+never change under the same URL, so they are sent with a year-long
+`immutable` Cache-Control; anything else must be revalidated on every use.
+
+With `ASSET_OFFLOAD` set, the bytes never pass through a Python worker:
+'x-sendfile' hands the absolute path to the server in an `X-Sendfile` header
+(Apache mod_xsendfile, lighttpd), 'x-accel-redirect' hands nginx a path under
+`ASSET_ACCEL_PREFIX`, an internal location aliased to `static/uploads`:
+
+    location /protected-uploads/ {
+        internal;
+        alias /app/static/uploads/;
+    }
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import Blueprint, abort, current_app, send_from_directory
+from werkzeug.security import safe_join
+
+from asset_urls import UPLOAD_PREFIX, is_fingerprinted
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Folders of static/uploads anyone may fetch
+PUBLIC_FOLDERS = ('services',)
+
+assets_router = Blueprint('assets', __name__)
+
+
+def send_upload(filename, immutable=False, private=False, download_name=None):
+    """Response for `filename` (relative to static/uploads), offloaded to the proxy when configured.
+
+    Conditional and Range requests are answered by whoever sends the bytes.
+    `private` keeps shared caches from storing responses of authenticated
+    endpoints. Aborts with 404 if the file doesn't exist.
+    """
+    directory = os.path.join(current_app.root_path, UPLOAD_PREFIX)
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    as_attachment = download_name is not None
+    max_age = IMMUTABLE_MAX_AGE if immutable else None
+    if current_app.config.get('ASSET_OFFLOAD') == 'x-accel-redirect':
+        mimetype = mimetypes.guess_type(download_name or filename)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = current_app.config['ASSET_ACCEL_PREFIX'].rstrip('/')
+        response.headers['X-Accel-Redirect'] = f'{prefix}/{quote(filename)}'
+        if as_attachment:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        # nginx keeps these headers and adds Last-Modified, ETag and Range support itself
+        if immutable:
+            response.cache_control.max_age = max_age
+        else:
+            response.cache_control.no_cache = True
+    else:
+        # Sends an X-Sendfile header instead of the body when USE_X_SENDFILE is set
+        response = send_from_directory(
+            directory, filename, as_attachment=as_attachment, download_name=download_name, max_age=max_age
+        )
+
+    if immutable:
+        response.cache_control.immutable = True
+        if private:
+            response.cache_control.public = False
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+    return response
+
+
+@assets_router.route('/assets/<path:filename>')
+def serve_asset(filename):
+    if filename.split('/', 1)[0] not in PUBLIC_FOLDERS:
+        abort(404)
+    return send_upload(filename, immutable=is_fingerprinted(filename))
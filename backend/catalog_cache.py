@@ -0,0 +1,64 @@
+"""Versioned cache of the public service catalog with ETag revalidation.
+
+Every committed write to a service or category bumps a catalog version kept
+in Redis, and the version is part of each cache key, so edits are visible on
+the next request instead of after a TTL. Entries hold the already serialised
+body with its strong ETag; a client presenting a matching If-None-Match gets
+a 304 without the catalog being queried or serialised.
+"""
+import hashlib
+
+from flask import current_app, request
+
+from cache import cache
+from commit_hooks import after_commit
+from database.models import Category, Services
+from utils import redis_client, with_next_cursor
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# Request arguments that change the response; anything else must not split the cache
+CATALOG_ARGS = ('cursor', 'limit')
+
+
+def catalog_response(name, build):
+    """Response for catalog endpoint `name`, from the cache when possible.
+
+    `build` is called on a miss and returns (data, next_cursor); a ValueError
+    it raises propagates, so invalid requests are never cached.
+    """
+    version = int(redis_client.get(CATALOG_VERSION_KEY) or 0)
+    params = ':'.join(f'{arg}={request.args.get(arg, "")}' for arg in CATALOG_ARGS)
+    key = f'catalog:{name}:v{version}:{params}'
+
+    entry = cache.get(key)
+    if entry is None:
+        data, next_cursor = build()
+        body = current_app.json.dumps(data)
+        entry = {
+            'body': body,
+            'etag': hashlib.sha256(body.encode()).hexdigest(),
+            'next_cursor': next_cursor,
+        }
+        cache.set(key, entry, timeout=CATALOG_CACHE_TIMEOUT)
+
+    if request.if_none_match.contains(entry['etag']):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(entry['body'], mimetype='application/json')
+
+    # Clients may keep the copy but must revalidate it on every use
+    response.set_etag(entry['etag'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return with_next_cursor(response, entry['next_cursor'])
+
+def bump_catalog_version():
+    redis_client.incr(CATALOG_VERSION_KEY)
+
+
+# Any committed write to a service or category makes a new catalog version
+def _catalog_writes(session, obj):
+    if isinstance(obj, (Services, Category)):
+        return ('catalog',)
+
+after_commit('bump catalog version', _catalog_writes, lambda keys: bump_catalog_version())
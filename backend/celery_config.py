@@ -1,26 +1,69 @@
-from celery import Celery
+from celery import Celery, Task
 import os
 
-def init_celery(app):
-    celery = Celery(
-        app.import_name,
-        backend=app.config['CELERY_RESULT_BACKEND'],
-        broker=app.config['CELERY_BROKER_URL'],
-        include=['celery_task']
-    )
-    celery.conf.update(
-        broker_transport_options={
-            'visibility_timeout': 3600,
-            'polling_interval': 10.0,
-        },
-        worker_prefetch_multiplier=1,
-        task_acks_late=True,
-        broker_connection_retry_on_startup=True,
-        redis_host=os.environ.get('REDIS_HOST', 'redis'),
-        redis_port=int(os.environ.get('REDIS_PORT', 6379))
-    )
-
-    celery.conf.beat_schedule = {
+# Celery keeps its own pools (kombu for the broker, redis-py for results), limited the same way as the app's
+CELERY_REDIS_MAX_CONNECTIONS = int(os.environ.get('CELERY_REDIS_MAX_CONNECTIONS', 10))
+REDIS_SOCKET_TIMEOUT = float(os.environ.get('REDIS_SOCKET_TIMEOUT', 5))
+REDIS_CONNECT_TIMEOUT = float(os.environ.get('REDIS_CONNECT_TIMEOUT', 2))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+
+REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+
+_flask_app = None
+
+
+class ContextTask(Task):
+    """Runs inside the application context of the Flask app given to `init_celery`."""
+
+    def __call__(self, *args, **kwargs):
+        with _flask_app.app_context():
+            return self.run(*args, **kwargs)
+
+
+# Created on import so task modules only need this one, not the web app
+celery = Celery(
+    'home_service',
+    backend=os.environ.get('CELERY_RESULT_BACKEND', f'redis://{REDIS_HOST}:{REDIS_PORT}/3'),
+    broker=os.environ.get('CELERY_BROKER_URL', f'redis://{REDIS_HOST}:{REDIS_PORT}/2'),
+    include=['celery_task'],
+    task_cls=ContextTask
+)
+
+celery.conf.update(
+    broker_transport_options={
+        'visibility_timeout': 3600,
+        'polling_interval': 10.0,
+        'max_connections': CELERY_REDIS_MAX_CONNECTIONS,
+        'socket_timeout': REDIS_SOCKET_TIMEOUT,
+        'socket_connect_timeout': REDIS_CONNECT_TIMEOUT,
+        'health_check_interval': REDIS_HEALTH_CHECK_INTERVAL,
+    },
+    # Bound the connections each process opens to the broker and result backend
+    broker_pool_limit=int(os.environ.get('CELERY_BROKER_POOL_LIMIT', 10)),
+    redis_max_connections=CELERY_REDIS_MAX_CONNECTIONS,
+    redis_socket_timeout=REDIS_SOCKET_TIMEOUT,
+    redis_socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    redis_backend_health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    broker_connection_retry_on_startup=True,
+    # OTP mail has its own queue and worker so reports and exports can't hold it up
+    task_default_queue='celery',
+    task_routes={
+        'celery_task.send_otp': {'queue': 'otp'},
+        'celery_task.send_daily_professional_reminders': {'queue': 'bulk'},
+        'celery_task.send_monthly_activity_report': {'queue': 'bulk'},
+        'celery_task.send_monthly_report_chunk': {'queue': 'bulk'},
+        'celery_task.monthly_report_summary': {'queue': 'bulk'},
+        'celery_task.export_service_requests_to_csv': {'queue': 'bulk'},
+        'celery_task.export_service_requests_to_parquet': {'queue': 'bulk'},
+    },
+    redis_host=REDIS_HOST,
+    redis_port=REDIS_PORT
+)
+
+celery.conf.beat_schedule = {
     'daily-professional-reminders': {
         'task': 'celery_task.send_daily_professional_reminders',
         'schedule': 60 * 60 * 24,
@@ -32,13 +75,21 @@ def init_celery(app):
     'check-expired-service-requests': {
         'task': 'celery_task.check_expired_service_requests',
         'schedule': 60 * 60 * 12,
+    },
+    'reconcile-rating-aggregates': {
+        'task': 'celery_task.reconcile_rating_aggregates',
+        'schedule': 60 * 60 * 24,
+    },
+    'purge-expired-exports': {
+        'task': 'celery_task.purge_expired_exports',
+        'schedule': 60 * 60,
     }
 }
 
-    class ContextTask(celery.Task):
-        def __call__(self, *args, **kwargs):
-            with app.app_context():
-                return self.run(*args, **kwargs)
 
-    celery.Task = ContextTask
-    return celery
\ No newline at end of file
+def init_celery(app):
+    """Run tasks inside `app`'s application context."""
+    global _flask_app
+    _flask_app = app
+    app.extensions['celery'] = celery
+    return celery
@@ -1,91 +1,270 @@
 import csv
+import gzip
 import os
-from datetime import datetime, timedelta, timezone
+import time
+import smtplib
+from html import escape
+from itertools import groupby
+from string import Template
+from datetime import date, datetime, timedelta, timezone
 
 from flask import current_app
+from celery import chord, group
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-import smtplib
-import base64
+from sqlalchemy import func, select
 
-from database.models import db, ServiceRequest, Professional, UserLogin, UserAddress, ServiceStats
-from utils import (
-    SMTP_SERVER_HOST, 
-    SMTP_SERVER_PORT, 
-    SENDER_ADDRESS, 
-    SENDER_PASSWORD,
-    redis_client
-)
+from database.models import db, ServiceRequest, Professional, UserLogin, UserAddress, ServiceStats, Services, Category, DailyServiceRollup
+from utils import redis_client, export_download_token, send_otp_email, SERVICE_IMAGE_FOLDER, SERVICE_IMAGE_VARIANT_FOLDER, upload_path
+from mailer import mail_transport, SENDER_ADDRESS
+from serviceability import area_counts
+from dashboard_cache import invalidate_dashboards
 
-from app import celery
+from celery_config import celery
 
 
+REMINDER_BATCH_SIZE = 100
+
+@celery.task(bind=True, max_retries=3, default_retry_delay=5)
+def send_otp(self, email, otp):
+    """Deliver a verification code. Routed to the 'otp' queue so bulk mail never delays it."""
+    try:
+        send_otp_email(email, otp)
+    except (smtplib.SMTPException, OSError) as e:
+        raise self.retry(exc=e)
+
+IMAGE_VARIANT_WIDTHS = (320, 640, 1024)
+IMAGE_QUALITY = 80
+
 @celery.task
-def send_daily_professional_reminders():
-    # Find professionals with pending service requests
-    pending_requests = ServiceRequest.query.filter_by(status='accepted').all()
-    
-    for request in pending_requests:
-        # Check if professional exists and has pending requests
-        if request.professional and request.professional.user_login:
-            professional = request.professional
-            professional_email = professional.user_login.email
-            
-            # Compose email
-            msg = MIMEMultipart()
-            msg['From'] = SENDER_ADDRESS
-            msg['To'] = professional_email
-            msg['Subject'] = 'Pending Service Request Reminder'
-            
-            # Email body
-            body = f"""
-            Dear {professional.user_login.name},
+def generate_image_variants(service_id):
+    """Write WebP and JPEG copies of a service image at each of `IMAGE_VARIANT_WIDTHS`.
+
+    Variant names derive from the source's content-hash name, so an image
+    shared by several services is only resized once. Widths above the
+    original's are skipped rather than upscaled.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    service = Services.query.get(service_id)
+    if not service or not upload_path(service.img).startswith(SERVICE_IMAGE_FOLDER):
+        return None
+
+    source = service.img
+    stem = os.path.splitext(os.path.basename(upload_path(source)))[0]
+    os.makedirs(SERVICE_IMAGE_VARIANT_FOLDER, exist_ok=True)
+
+    try:
+        with Image.open(upload_path(source)) as image:
+            # Let the JPEG decoder skip detail no variant needs
+            image.draft('RGB', (max(IMAGE_VARIANT_WIDTHS),) * 2)
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+            widths = [width for width in IMAGE_VARIANT_WIDTHS if width <= image.width] or [image.width]
+
+            variants = []
+            for width in widths:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+                variant = {'width': width}
+                for image_format, ext, options in (
+                    ('webp', 'webp', {'quality': IMAGE_QUALITY, 'method': 4}),
+                    ('jpeg', 'jpg', {'quality': IMAGE_QUALITY, 'optimize': True, 'progressive': True}),
+                ):
+                    path = f'{SERVICE_IMAGE_VARIANT_FOLDER}/{stem}_{width}.{ext}'
+                    if not os.path.exists(path):
+                        converted = resized if image_format == 'webp' else resized.convert('RGB')
+                        converted.save(f'{path}.tmp', format=image_format.upper(), **options)
+                        os.replace(f'{path}.tmp', path)
+                    variant[image_format] = path
+                variants.append(variant)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"Failed to generate variants for service {service_id}: {e}")
+        return None
+
+    # The image may have been replaced while this task ran
+    db.session.refresh(service)
+    if service.img == source:
+        service.img_variants = variants
+        db.session.commit()
+    return {'service_id': service_id, 'variants': len(variants)}
+
+@celery.task
+def backfill_image_variants():
+    """Queue variant generation for every uploaded service image that has none yet."""
+    service_ids = [service_id for service_id, in db.session.query(Services.id).filter(
+        func.replace(Services.img, '\\', '/').startswith(SERVICE_IMAGE_FOLDER),
+        Services.img_variants.is_(None)
+    )]
+    for service_id in service_ids:
+        generate_image_variants.delay(service_id)
+    return {'queued': len(service_ids)}
+
+@celery.task
+def send_daily_professional_reminders(batch_size=REMINDER_BATCH_SIZE):
+    """Email every professional one digest of their accepted service requests.
+
+    Requests are read in a single joined query, streamed `batch_size` rows at
+    a time in professional order, and the digests go out in batches of
+    `batch_size` over one SMTP session.
+    """
+    accepted_requests = db.session.query(
+        ServiceRequest.professional_id,
+        UserLogin.name,
+        UserLogin.email,
+        Services.name,
+        ServiceRequest.date_of_request
+    ).join(
+        Professional, Professional.id == ServiceRequest.professional_id
+    ).join(
+        UserLogin, UserLogin.id == Professional.user_login_id
+    ).join(
+        Services, Services.id == ServiceRequest.service_id
+    ).filter(
+        ServiceRequest.status == 'accepted'
+    ).order_by(
+        ServiceRequest.professional_id,
+        ServiceRequest.date_of_request
+    ).execution_options(yield_per=batch_size)
+
+    metrics = {'professionals': 0, 'requests': 0, 'failed': 0}
+    batch = []
+    for _, rows in groupby(accepted_requests, key=lambda row: row.professional_id):
+        rows = list(rows)
+        batch.append(_professional_reminder(rows))
+        metrics['professionals'] += 1
+        metrics['requests'] += len(rows)
+
+        if len(batch) >= batch_size:
+            metrics['failed'] += _send_reminders(batch)
+            batch = []
+
+    if batch:
+        metrics['failed'] += _send_reminders(batch)
+    return metrics
+
+def _professional_reminder(rows):
+    _, name, email, _, _ = rows[0]
+
+    msg = MIMEMultipart()
+    msg['From'] = SENDER_ADDRESS
+    msg['To'] = email
+    msg['Subject'] = 'Pending Service Request Reminder'
+
+    requests = "\n".join(
+        f"            - {service_name} on {date_of_request}"
+        for _, _, _, service_name, date_of_request in rows
+    )
+    # Email body
+    body = f"""
+            Dear {name},
             
-            You have a pending service request that requires your attention:
+            You have {len(rows)} pending service request(s) that require your attention:
             
-            Service: {request.service.name}
-            Request Date: {request.date_of_request}
-            Status: Pending
+{requests}
             
-            Please complete the service on time.
+            Please complete the services on time.
             
             Best regards,
             Home Service Team
             """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Send email
-            try:
-                smtp_server = smtplib.SMTP(SMTP_SERVER_HOST, SMTP_SERVER_PORT)
-                smtp_server.login(SENDER_ADDRESS, SENDER_PASSWORD)
-                smtp_server.send_message(msg)
-                smtp_server.quit()
-            except Exception as e:
-                print(f"Failed to send reminder email: {e}")
-
-@celery.task()
-def send_monthly_activity_report():
+
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def _send_reminders(messages):
+    try:
+        failures = mail_transport.send_many(messages)
+    except Exception as e:
+        print(f"Failed to send reminder emails: {e}")
+        return len(messages)
+
+    for message, error in failures:
+        print(f"Failed to send reminder email to {message['To']}: {error}")
+    return len(failures)
+
+REPORT_CHUNK_SIZE = 1000
+REPORT_BATCH_SIZE = 100
+
+@celery.task(bind=True)
+def send_monthly_activity_report(self, chunk_size=REPORT_CHUNK_SIZE):
+    """Render the report once and fan it out as one subtask per range of `chunk_size` user IDs."""
     # Get stats for the previous month
     stats = ServiceStats.get_instance()
-    
-    # Find all users
-    users = UserLogin.query.filter_by(role='user').all()
-    
-    for user in users:
-        # Compose email
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_ADDRESS
-        msg['To'] = user.email
-        msg['Subject'] = 'Monthly Service Activity Report'
-        
-        # HTML report template
-        html_report = f"""
+    template = _monthly_report_template(stats)
+
+    first_id, last_id = db.session.query(
+        func.min(UserLogin.id),
+        func.max(UserLogin.id)
+    ).filter(UserLogin.role == 'user').first()
+    if first_id is None:
+        return
+
+    run_id = self.request.id or datetime.now().strftime('%Y%m%d%H%M%S')
+    chunks = group(
+        send_monthly_report_chunk.s(run_id, start, min(start + chunk_size - 1, last_id), template)
+        for start in range(first_id, last_id + 1, chunk_size)
+    )
+    chord(chunks)(monthly_report_summary.s(run_id))
+    return {'run_id': run_id, 'chunks': len(chunks.tasks)}
+
+@celery.task(bind=True, max_retries=5, default_retry_delay=60)
+def send_monthly_report_chunk(self, run_id, first_id, last_id, template):
+    """Send the report to users with IDs in [first_id, last_id].
+
+    Each batch shares one SMTP session, and progress is checkpointed in Redis
+    after every recipient, so a retry or a redelivery after a worker restart
+    resumes after the last user reached without mailing anyone twice.
+    """
+    progress_key = f'monthly_report:{run_id}:{first_id}'
+    resume_after = int(redis_client.get(progress_key) or first_id - 1)
+    report = Template(template)
+
+    users = db.session.query(
+        UserLogin.id,
+        UserLogin.name,
+        UserLogin.email
+    ).filter(
+        UserLogin.role == 'user',
+        UserLogin.id > resume_after,
+        UserLogin.id <= last_id
+    ).order_by(UserLogin.id).all()
+
+    failed = 0
+    try:
+        for start in range(0, len(users), REPORT_BATCH_SIZE):
+            with mail_transport.session() as session:
+                for user_id, name, email in users[start:start + REPORT_BATCH_SIZE]:
+                    try:
+                        session.send(_monthly_report_message(email, report.safe_substitute(name=escape(name))))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as error:
+                        # Refused for good, a retry wouldn't get it through either
+                        failed += 1
+                        print(f"Failed to send monthly report to {email}: {error}")
+                    redis_client.set(progress_key, user_id, ex=60 * 60 * 24 * 7)
+    except (smtplib.SMTPException, OSError) as e:
+        raise self.retry(exc=e)
+
+    return {'first_id': first_id, 'last_id': last_id, 'sent': len(users) - failed, 'failed': failed}
+
+@celery.task
+def monthly_report_summary(results, run_id):
+    totals = {
+        'sent': sum(result['sent'] for result in results),
+        'failed': sum(result['failed'] for result in results),
+    }
+    redis_client.delete(*[f'monthly_report:{run_id}:{result["first_id"]}' for result in results])
+    print(f"Monthly activity report {run_id}: {totals}")
+    return totals
+
+def _monthly_report_template(stats):
+    # HTML report template, $name is filled in per recipient
+    return f"""
         <html>
         <body>
             <h1>Monthly Service Activity Report</h1>
-            <p>Dear {user.name},</p>
+            <p>Dear $name,</p>
             
             <h2>Service Statistics</h2>
             <ul>
@@ -99,103 +278,292 @@ def send_monthly_activity_report():
         </body>
         </html>
         """
-        
-        msg.attach(MIMEText(html_report, 'html'))
-        
-        # Send email
-        try:
-            smtp_server = smtplib.SMTP(SMTP_SERVER_HOST, SMTP_SERVER_PORT)
-            smtp_server.login(SENDER_ADDRESS, SENDER_PASSWORD)
-            smtp_server.send_message(msg)
-            smtp_server.quit()
-        except Exception as e:
-            print(f"Failed to send monthly report: {e}")
+
+def _monthly_report_message(email, html_report):
+    msg = MIMEMultipart()
+    msg['From'] = SENDER_ADDRESS
+    msg['To'] = email
+    msg['Subject'] = 'Monthly Service Activity Report'
+    msg.attach(MIMEText(html_report, 'html'))
+    return msg
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = [
+    'service_id', 'customer_id', 'professional_id', 
+    'date_of_request', 'date_of_completion', 
+    'status', 'rating', 'review', 'total_amount'
+]
 
 @celery.task
-def export_service_requests_to_csv(admin_email):
-    # Get completed service requests
-    completed_requests = ServiceRequest.query.filter_by(status='completed').all()
+def export_service_requests_to_csv(admin_email, status='completed', start_date=None, end_date=None):
+    """Export service requests to a gzipped CSV and email the admin a download link.
+
+    Rows are streamed from the database `EXPORT_BATCH_SIZE` at a time straight
+    into the compressed file, so memory stays flat whatever the export size.
+    `start_date`/`end_date` are inclusive ISO dates on the request creation
+    date; `status=None` exports every status.
+    """
+    requests = db.session.query(
+        *(getattr(ServiceRequest, field) for field in EXPORT_FIELDS)
+    ).filter(
+        *_export_filters(status, start_date, end_date)
+    ).order_by(ServiceRequest.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
     
     # Generate unique filename
-    filename = f'service_requests_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+    filename = f'service_requests_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv.gz'
     export_folder = current_app.config.get('EXPORT_FOLDER', '/tmp')
     os.makedirs(export_folder, exist_ok=True)
     filepath = os.path.join(export_folder, filename)
-    print(filepath)
     
     # Create CSV
-    with open(filepath, 'w', newline='') as csvfile:
-        fieldnames = [
-            'service_id', 'customer_id', 'professional_id', 
-            'date_of_request', 'date_of_completion', 
-            'status', 'rating', 'review', 'total_amount'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for request in completed_requests:
-            writer.writerow({
-                'service_id': request.service_id,
-                'customer_id': request.customer_id,
-                'professional_id': request.professional_id,
-                'date_of_request': request.date_of_request,
-                'date_of_completion': request.date_of_completion,
-                'status': request.status,
-                'rating': request.rating,
-                'review': request.review,
-                'total_amount': request.total_amount
-            })
-    
+    rows = 0
+    with gzip.open(filepath, 'wt', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(EXPORT_FIELDS)
+        for request in requests:
+            writer.writerow(request)
+            rows += 1
+
+    _send_export_link(admin_email, filename, rows)
+    return {'filename': filename, 'rows': rows}
+
+PARQUET_SCHEMA_FIELDS = [
+    ('id', 'int64'),
+    ('service_id', 'int64'),
+    ('service_name', 'string'),
+    ('category_id', 'int64'),
+    ('category_name', 'string'),
+    ('customer_id', 'int64'),
+    ('professional_id', 'int64'),
+    ('pincode', 'string'),
+    ('status', 'string'),
+    ('date_of_request', 'timestamp'),
+    ('date_of_completion', 'timestamp'),
+    ('created_at', 'timestamp'),
+    ('rating', 'int32'),
+    ('review', 'string'),
+    ('total_amount', 'float64'),
+]
+
+@celery.task
+def export_service_requests_to_parquet(admin_email, status='completed', start_date=None, end_date=None):
+    """Export service requests, joined with service, category and pincode, to Parquet.
+
+    Takes the same filters as `export_service_requests_to_csv`. Rows are read
+    from the cursor `EXPORT_BATCH_SIZE` at a time and each batch is written as
+    one typed, zstd-compressed record batch.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        'int32': pa.int32(),
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in PARQUET_SCHEMA_FIELDS])
+
+    requests = select(
+        ServiceRequest.id,
+        ServiceRequest.service_id,
+        Services.name,
+        Services.category_id,
+        Category.name,
+        ServiceRequest.customer_id,
+        ServiceRequest.professional_id,
+        UserAddress.zip_code,
+        ServiceRequest.status,
+        ServiceRequest.date_of_request,
+        ServiceRequest.date_of_completion,
+        ServiceRequest.created_at,
+        ServiceRequest.rating,
+        ServiceRequest.review,
+        ServiceRequest.total_amount
+    ).join(
+        Services, Services.id == ServiceRequest.service_id
+    ).join(
+        Category, Category.id == Services.category_id
+    ).join(
+        UserAddress, UserAddress.id == ServiceRequest.address_id
+    ).where(
+        *_export_filters(status, start_date, end_date)
+    ).order_by(ServiceRequest.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    filename = f'service_requests_{datetime.now().strftime("%Y%m%d_%H%M%S")}.parquet'
+    export_folder = current_app.config.get('EXPORT_FOLDER', '/tmp')
+    os.makedirs(export_folder, exist_ok=True)
+    filepath = os.path.join(export_folder, filename)
+
+    rows = 0
+    with pq.ParquetWriter(filepath, schema, compression='zstd') as writer:
+        for partition in db.session.execute(requests).partitions():
+            columns = list(zip(*partition))
+            writer.write_batch(pa.record_batch(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            ))
+            rows += len(partition)
+
+    _send_export_link(admin_email, filename, rows)
+    return {'filename': filename, 'rows': rows}
+
+def _export_filters(status, start_date, end_date):
+    filters = []
+    if status:
+        filters.append(ServiceRequest.status == status)
+    if start_date:
+        filters.append(ServiceRequest.created_at >= datetime.fromisoformat(start_date))
+    if end_date:
+        filters.append(ServiceRequest.created_at < datetime.fromisoformat(end_date) + timedelta(days=1))
+    return filters
+
+def _send_export_link(admin_email, filename, rows):
+    link = f"{current_app.config['BACKEND_URL']}/api/admin/exports/{export_download_token(filename)}"
+    hours = current_app.config['EXPORT_LINK_MAX_AGE'] // 3600
+
     msg = MIMEMultipart()
     msg['From'] = SENDER_ADDRESS
     msg['To'] = admin_email
     msg['Subject'] = 'Service Requests Export'
-    
-    # Attach CSV
-    with open(filepath, 'rb') as f:
-        attachment = MIMEBase('application', 'octet-stream')
-        attachment.set_payload(f.read())
-        attachment.add_header('Content-Disposition', 'attachment', filename=filename)
-    
-    msg.attach(attachment)
-    
-    try:
-        smtp_server = smtplib.SMTP(SMTP_SERVER_HOST, SMTP_SERVER_PORT)
-        smtp_server.login(SENDER_ADDRESS, SENDER_PASSWORD)
-        smtp_server.send_message(msg)
-        smtp_server.quit()
+    msg.attach(MIMEText(
+        f'Your export of {rows} service requests is ready: <a href="{link}">{filename}</a>.'
+        f'<br>The link expires in {hours} hours.',
+        'html'
+    ))
 
-        os.remove(filepath)
+    try:
+        mail_transport.send(msg)
     except Exception as e:
         print(f"Failed to export service requests: {e}")
 
 @celery.task
-def check_expired_service_requests():
+def purge_expired_exports():
+    """Delete export files whose download links have expired."""
+    export_folder = current_app.config.get('EXPORT_FOLDER', '/tmp')
+    if not os.path.isdir(export_folder):
+        return 0
+
+    cutoff = time.time() - current_app.config['EXPORT_LINK_MAX_AGE']
+    removed = 0
+    for entry in os.scandir(export_folder):
+        if entry.is_file() and entry.name.startswith('service_requests_') and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+EXPIRY_CHUNK_SIZE = 500
+
+@celery.task
+def check_expired_service_requests(chunk_size=EXPIRY_CHUNK_SIZE):
+    """Close pending requests older than 24 hours, `chunk_size` requests per transaction.
+
+    A request every professional in its area has rejected becomes 'rejected',
+    anything else 'expired'. Each chunk costs one read, a Redis pipeline for
+    the area counts and one for the rejections, at most two UPDATE statements
+    closing requests and one for the service stats, then a Redis pipeline
+    clearing the rejection sets, so memory and lock time stay bounded.
+    """
+    started = time.monotonic()
     current_time = datetime.now(timezone.utc)
     twenty_four_hours_ago = current_time - timedelta(hours=24)
-    
-    pending_requests = ServiceRequest.query.filter(
-        ServiceRequest.status == 'pending',
-        ServiceRequest.date_of_request < twenty_four_hours_ago
-    ).all()
-    
-    for request in pending_requests:
-        # Check if any professionals are available in the area
-        professionals_count = Professional.query.join(UserLogin) \
-            .join(UserAddress) \
-            .filter(
-                Professional.category_id == request.service.category_id,
-                Professional.is_approved == True,
-                UserAddress.zip_code == request.address.zip_code
-            ).count()
-        
-        # Get existing rejections
-        key = f'service_request_rejections:{request.id}'
-        rejected_count = redis_client.scard(key)
-        
-        if rejected_count >= professionals_count:
-            request.status = 'rejected'
-        else:
-            request.status = 'expired'
-    
-    db.session.commit()
\ No newline at end of file
+    metrics = {'chunks': 0, 'scanned': 0, 'expired': 0, 'rejected': 0}
+
+    last_id = 0
+    while True:
+        pending_requests = db.session.query(
+            ServiceRequest.id,
+            Services.category_id,
+            UserAddress.zip_code
+        ).join(
+            Services, Services.id == ServiceRequest.service_id
+        ).join(
+            UserAddress, UserAddress.id == ServiceRequest.address_id
+        ).filter(
+            ServiceRequest.status == 'pending',
+            ServiceRequest.date_of_request < twenty_four_hours_ago,
+            ServiceRequest.id > last_id
+        ).order_by(ServiceRequest.id).limit(chunk_size).all()
+
+        if not pending_requests:
+            break
+        last_id = pending_requests[-1].id
+
+        # Professionals available in each area and the rejections of each request
+        professionals_counts = area_counts(
+            (request.category_id, request.zip_code) for request in pending_requests
+        )
+        pipe = redis_client.pipeline(transaction=False)
+        for request in pending_requests:
+            pipe.scard(f'service_request_rejections:{request.id}')
+        rejected_counts = pipe.execute()
+
+        rejected_ids, expired_ids = [], []
+        for request, rejected_count in zip(pending_requests, rejected_counts):
+            if rejected_count >= professionals_counts[(request.category_id, request.zip_code)]:
+                rejected_ids.append(request.id)
+            else:
+                expired_ids.append(request.id)
+
+        # Only requests still pending are closed, one may have been accepted meanwhile
+        rejected = _close_pending_requests(rejected_ids, 'rejected')
+        expired = _close_pending_requests(expired_ids, 'expired')
+        # Bulk updates skip the mapper hooks that keep the stats current
+        ServiceStats.apply_deltas(
+            db.session.connection(),
+            total_pending_requests=-(rejected + expired),
+            total_expired_requests=expired
+        )
+        db.session.commit()
+
+        pipe = redis_client.pipeline(transaction=False)
+        for request_id in rejected_ids + expired_ids:
+            pipe.delete(f'service_request_rejections:{request_id}')
+        pipe.execute()
+
+        metrics['chunks'] += 1
+        metrics['scanned'] += len(pending_requests)
+        metrics['rejected'] += rejected
+        metrics['expired'] += expired
+        print(f"Expiry chunk {metrics['chunks']}: {len(pending_requests)} scanned, "
+              f"{rejected} rejected, {expired} expired")
+
+    # Bulk updates skip the session hooks that invalidate cached dashboards too
+    if metrics['rejected'] or metrics['expired']:
+        invalidate_dashboards()
+
+    metrics['duration_seconds'] = round(time.monotonic() - started, 3)
+    print(f"Expired service requests: {metrics}")
+    return metrics
+
+def _close_pending_requests(request_ids, status):
+    if not request_ids:
+        return 0
+    return ServiceRequest.query.filter(
+        ServiceRequest.id.in_(request_ids),
+        ServiceRequest.status == 'pending'
+    ).update({ServiceRequest.status: status}, synchronize_session=False)
+
+@celery.task
+def backfill_daily_rollups(start_date=None, end_date=None):
+    """Recompute the dashboard rollups for the inclusive ISO date range, or for every day."""
+    start = date.fromisoformat(start_date) if start_date else None
+    end = date.fromisoformat(end_date) if end_date else None
+    rows = DailyServiceRollup.rebuild(start, end)
+    return {'rows': rows, 'start_date': start_date, 'end_date': end_date}
+
+@celery.task
+def reconcile_rating_aggregates():
+    """Recompute the running rating aggregates from scratch and repair any drift."""
+    drift = {
+        'services': Services.reconcile_ratings(),
+        'professionals': Professional.reconcile_ratings(),
+    }
+    db.session.commit()
+
+    for name, rows in drift.items():
+        for row in rows:
+            print(f"Rating drift on {name} {row['id']}: stored {row['stored']}, expected {row['expected']}")
+
+    return drift
@@ -0,0 +1,55 @@
+"""Side effects of committed writes: cache invalidation, Redis index updates.
+
+A module registers a hook with `after_commit`. Its `collect(session, obj)`
+is called for every object a flush writes and returns the keys that write
+affects (IDs to invalidate, for instance). The keys are gathered per session
+and handed to `apply(keys)` once the transaction commits. A rollback
+discards them, so nothing runs for writes that never happened. The commit
+has already happened when `apply` runs, so its failures are printed instead
+of raised.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_hooks = {}
+
+
+def after_commit(action, collect, apply):
+    """Register a hook; `action` ("bump catalog version") names it in failure messages."""
+    _hooks[action] = (collect, apply)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_keys(session, flush_context):
+    # Dirty objects include ones whose attributes were set to the values they had
+    written = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if obj not in session.dirty or session.is_modified(obj)
+    ]
+    if not written:
+        return
+
+    pending = session.info.setdefault('after_commit', {})
+    for action, (collect, _) in _hooks.items():
+        keys = pending.setdefault(action, set())
+        for obj in written:
+            keys.update(collect(session, obj) or ())
+        keys.discard(None)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_keys(session):
+    pending = session.info.pop('after_commit', None)
+    if not pending:
+        return
+
+    for action, keys in pending.items():
+        if not keys:
+            continue
+        try:
+            _hooks[action][1](keys)
+        except Exception as e:
+            print(f"Failed to {action}: {e}")
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_keys(session):
+    session.info.pop('after_commit', None)
@@ -0,0 +1,83 @@
+"""Cached dashboard payloads, invalidated by the writes that change them.
+
+Each cache key embeds a version number kept in Redis, one for the admin view
+and one per professional. Committing a change to a service request (booking,
+acceptance, completion, review) bumps the versions of the admin view and of
+the professionals involved, so their next dashboard load misses and rebuilds
+while every other professional's cached payload stays valid. The TTL only
+bounds how long unread entries of old versions linger.
+"""
+from cache import cache
+from commit_hooks import after_commit
+from database.models import ServiceRequest, db
+from utils import redis_client
+
+DASHBOARD_CACHE_TIMEOUT = 60 * 60
+SCOPES = ('admin', 'professional')
+
+
+def _version_key(scope):
+    return f'dashboard:version:{scope}'
+
+def _counter_key(scope, outcome):
+    return f'dashboard:{outcome}:{scope.split(":")[0]}'
+
+
+def cached_dashboard(scope, params, build):
+    """Payload for `scope` ('admin' or 'professional:<id>') and `params`, built on a miss.
+
+    `params` must be the resolved parameters (e.g. the actual start and end
+    dates, not "last seven days") so one key never serves two different
+    payloads. `build` is called without arguments and returns a
+    JSON-serialisable payload.
+    """
+    version = int(redis_client.get(_version_key(scope)) or 0)
+    key = f'dashboard:{scope}:v{version}:' + ':'.join(str(param) for param in params)
+
+    payload = cache.get(key)
+    if payload is not None:
+        redis_client.incr(_counter_key(scope, 'hits'))
+        return payload
+
+    redis_client.incr(_counter_key(scope, 'misses'))
+    payload = build()
+    cache.set(key, payload, timeout=DASHBOARD_CACHE_TIMEOUT)
+    return payload
+
+def invalidate_dashboards(professional_ids=(), admin=True):
+    pipe = redis_client.pipeline(transaction=False)
+    if admin:
+        pipe.incr(_version_key('admin'))
+    for professional_id in professional_ids:
+        pipe.incr(_version_key(f'professional:{professional_id}'))
+    pipe.execute()
+
+def cache_stats():
+    """Hit/miss counters per dashboard since the counters were last reset."""
+    pipe = redis_client.pipeline(transaction=False)
+    for scope in SCOPES:
+        pipe.get(_counter_key(scope, 'hits'))
+        pipe.get(_counter_key(scope, 'misses'))
+    values = iter(pipe.execute())
+
+    stats = {}
+    for scope in SCOPES:
+        hits, misses = int(next(values) or 0), int(next(values) or 0)
+        stats[scope] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+        }
+    return stats
+
+
+# Committed service request writes: the admin view and the professionals involved, before and after
+def _dashboard_writes(session, obj):
+    if isinstance(obj, ServiceRequest):
+        return ('admin', obj.professional_id, *db.inspect(obj).attrs.professional_id.history.deleted)
+
+after_commit(
+    'invalidate dashboard cache',
+    _dashboard_writes,
+    lambda keys: invalidate_dashboards(keys - {'admin'})
+)
@@ -0,0 +1,61 @@
+import os
+from sqlalchemy import event
+
+
+def database_uri(default_path):
+    """Database URI from `DATABASE_URL`, falling back to the bundled SQLite file."""
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///{}'.format(default_path))
+    # Some hosts still hand out the scheme SQLAlchemy dropped in 1.4
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri):
+    """Engine/pool options for `SQLALCHEMY_ENGINE_OPTIONS`.
+
+    SQLite keeps SQLAlchemy's default pool; its tuning happens per connection in
+    `sqlite_pragmas`. Server databases get a sized pool that is checked before
+    use and recycled before the server drops idle connections.
+    """
+    if uri.startswith('sqlite'):
+        return {
+            'connect_args': {
+                # Seconds the driver waits on a locked database before raising
+                'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)) / 1000,
+            },
+        }
+
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True,
+    }
+
+
+def sqlite_pragmas():
+    return {
+        # Readers no longer block the writer and vice versa
+        'journal_mode': 'WAL',
+        # Safe with WAL: only the last transactions can be lost on power failure
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # Negative values are in KiB
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+    }
+
+
+def configure_engine(engine, pragmas):
+    """Apply `pragmas` to every new connection of a SQLite `engine`."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
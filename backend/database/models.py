@@ -1,9 +1,12 @@
+import importlib
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import relationship
-from sqlalchemy import DateTime, ForeignKey, func, event
-from datetime import datetime, timezone
+from sqlalchemy import DateTime, ForeignKey, func, event, case, select, insert
+from datetime import datetime, timezone, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from asset_urls import asset_url
+
 db = SQLAlchemy()
 
 class UserLogin(db.Model):
@@ -57,12 +60,12 @@ class UserAddress(db.Model):
     __tablename__ = 'user_addresses'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_login_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False)
+    user_login_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False, index=True)
     address_type = db.Column(db.String(20), nullable=False, default="user")
     street = db.Column(db.String(100), nullable=False)
     city = db.Column(db.String(100), nullable=False)
     state = db.Column(db.String(100), nullable=False)
-    zip_code = db.Column(db.String(100), nullable=False)
+    zip_code = db.Column(db.String(100), nullable=False, index=True)
     country = db.Column(db.String(50), nullable=False, default="India")
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -99,7 +102,106 @@ class Category(db.Model):
             'name': self.name
         }
 
-class Services(db.Model):
+MIN_RATING, MAX_RATING = 1, 5
+
+def parse_rating(value):
+    """`value` as a whole-star rating, or None for no rating.
+
+    Raises ValueError for anything outside MIN_RATING..MAX_RATING, which
+    would throw off the rating aggregates.
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError
+        rating = int(value)
+        if not MIN_RATING <= rating <= MAX_RATING:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f'Rating must be a whole number from {MIN_RATING} to {MAX_RATING}') from None
+    return rating
+
+def average_rating(rating_sum, rating_count):
+    """SQL average as stored in avg_rating; rounded by the database so every writer rounds alike."""
+    return func.round(rating_sum * 1.0 / rating_count, 2)
+
+class RatingAggregate:
+    """Running sum/count of completed-request ratings, kept current in O(1)."""
+
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Legacy column that mirrors rating_count for API consumers
+    rating_count_column = None
+    # ServiceRequest column the ratings are grouped by
+    rating_group_column = None
+
+    def apply_rating(self, old_rating, new_rating):
+        """Replace `old_rating` with `new_rating` in the aggregates.
+
+        Either side may be None (no rating yet / rating removed). The update is
+        written as SQL expressions so concurrent reviews don't overwrite each
+        other's increments; it runs in the caller's transaction.
+        """
+        delta_sum = (new_rating or 0) - (old_rating or 0)
+        delta_count = (new_rating is not None) - (old_rating is not None)
+        if not delta_sum and not delta_count:
+            return
+
+        model = type(self)
+        new_sum = model.rating_sum + delta_sum
+        new_count = model.rating_count + delta_count
+
+        self.rating_sum = new_sum
+        self.rating_count = new_count
+        self.avg_rating = case(
+            (new_count > 0, average_rating(new_sum, new_count)),
+            else_=0.0
+        )
+        setattr(self, self.rating_count_column, new_count)
+
+    @classmethod
+    def reconcile_ratings(cls):
+        """Recompute the aggregates of every row from the ratings and repair the ones that drifted.
+
+        Returns the repaired rows; the updates run in the caller's transaction.
+        """
+        group_column = getattr(ServiceRequest, cls.rating_group_column)
+        totals = db.session.query(
+            group_column,
+            func.sum(ServiceRequest.rating),
+            func.count(ServiceRequest.rating),
+            average_rating(func.sum(ServiceRequest.rating), func.count(ServiceRequest.rating))
+        ).filter(
+            ServiceRequest.status == 'completed',
+            ServiceRequest.rating.isnot(None),
+            group_column.isnot(None)
+        ).group_by(group_column)
+        expected = {key: (rating_sum, rating_count, avg) for key, rating_sum, rating_count, avg in totals}
+
+        drifted = []
+        rows = db.session.query(cls.id, cls.rating_sum, cls.rating_count, cls.avg_rating).all()
+        for row_id, rating_sum, rating_count, avg_rating in rows:
+            expected_sum, expected_count, expected_avg = expected.get(row_id, (0, 0, 0.0))
+            if (rating_sum, rating_count, avg_rating) == (expected_sum, expected_count, expected_avg):
+                continue
+
+            db.session.query(cls).filter(cls.id == row_id).update({
+                cls.rating_sum: expected_sum,
+                cls.rating_count: expected_count,
+                cls.avg_rating: expected_avg,
+                getattr(cls, cls.rating_count_column): expected_count,
+            }, synchronize_session=False)
+            drifted.append({
+                'id': row_id,
+                'stored': [rating_sum, rating_count],
+                'expected': [expected_sum, expected_count],
+            })
+
+        return drifted
+
+class Services(RatingAggregate, db.Model):
     __tablename__ = 'services'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -107,6 +209,8 @@ class Services(db.Model):
     description = db.Column(db.Text, nullable=False)
     base_price = db.Column(db.Float, nullable=False)
     img = db.Column(db.String(255), nullable=False, default='img/default_service.jpg')
+    # Resized copies of img: [{'width': 320, 'webp': path, 'jpeg': path}, ...], narrowest first
+    img_variants = db.Column(db.JSON, nullable=True)
     time_required = db.Column(db.Float, nullable=False)
     category_id = db.Column(db.Integer, ForeignKey('categories.id'), nullable=False)
     tags = db.Column(db.JSON)
@@ -115,13 +219,37 @@ class Services(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), 
                           onupdate=lambda: datetime.now(timezone.utc))
+
+    rating_count_column = 'total_requests'
+    rating_group_column = 'service_id'
+
+    # Variant served as `img`, sized for catalog cards
+    CARD_IMAGE_WIDTH = 640
+
+    def card_image(self):
+        """Path of the widest JPEG variant no wider than a card, or the original."""
+        fitting = [variant for variant in self.img_variants or [] if variant['width'] <= self.CARD_IMAGE_WIDTH]
+        return fitting[-1]['jpeg'] if fitting else self.img
+
+    def img_srcset(self):
+        """`srcset` strings per format, empty until the variants are generated."""
+        return {
+            image_format: ', '.join(
+                f"{asset_url(variant[image_format])} {variant['width']}w"
+                for variant in self.img_variants
+            )
+            for image_format in ('webp', 'jpeg')
+        } if self.img_variants else {}
+
     def to_dict(self):
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'base_price': self.base_price,
-            'img': 'http://localhost:5000/'+self.img,
+            'img': asset_url(self.card_image()),
+            'img_original': asset_url(self.img),
+            'img_srcset': self.img_srcset(),
             'time_required': self.time_required,
             'category_id': self.category_id,
             'tags': self.tags or [],
@@ -131,25 +259,15 @@ class Services(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
     
-    def update_rating(self):
-        
-        result = db.session.query(
-            func.avg(ServiceRequest.rating).label('avg_rating'),
-            func.count(ServiceRequest.id).label('total_requests')
-        ).filter(
-            ServiceRequest.service_id == self.id,
-            ServiceRequest.status == 'completed',
-            ServiceRequest.rating.isnot(None)
-        ).first()
-        
-        self.avg_rating = round(result.avg_rating, 2) or 0.0
-        self.total_requests = result.total_requests or 0
-
-class Professional(db.Model):
+class Professional(RatingAggregate, db.Model):
     __tablename__  = 'professionals'
+    __table_args__ = (
+        # Serviceability lookups: approved professionals of a category
+        db.Index('ix_professionals_category_approved', 'category_id', 'is_approved'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_login_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False)
+    user_login_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False, index=True)
     category_id = db.Column(db.Integer, ForeignKey('categories.id'), nullable=False)
     experience = db.Column(db.Integer, nullable=False)
     resume_path = db.Column(db.String(255), nullable=True)
@@ -162,12 +280,16 @@ class Professional(db.Model):
     # Relationships
     user_login = db.relationship("UserLogin", backref=db.backref("professionals", uselist=False))
 
+    rating_count_column = 'total_services'
+    rating_group_column = 'professional_id'
+
     def to_dict(self):
         return {
             'id': self.id,
             'category': self.category_id,
             'experience': self.experience,
-            'resume_path': 'http://localhost:5000/'+self.resume_path,
+            # Resumes are private, admins download them through the admin API
+            'has_resume': bool(self.resume_path),
             'rating': round(self.avg_rating, 2),
             'total_services':self.total_services,
             'is_approved': self.is_approved,
@@ -175,34 +297,29 @@ class Professional(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
     
-    def update_rating(self):
-        result = db.session.query(
-            func.avg(ServiceRequest.rating).label('avg_rating'),
-            func.count(ServiceRequest.id).label('total_services')
-        ).filter(
-            ServiceRequest.professional_id == self.id,
-            ServiceRequest.status == 'completed',
-            ServiceRequest.rating.isnot(None)
-        ).first()
-        
-        self.avg_rating = round(result.avg_rating) or 0.0
-        self.total_services = result.total_services or 0
-
 class ServiceRequest(db.Model):
     __tablename__  = 'service_requests'
+    __table_args__ = (
+        # Dashboards and admin counts by status, expiry job scans stale pending requests
+        db.Index('ix_service_requests_status_created_at', 'status', 'created_at'),
+        db.Index('ix_service_requests_status_date_of_request', 'status', 'date_of_request'),
+        # Professional bookings, dashboard and rating aggregates
+        db.Index('ix_service_requests_professional_status', 'professional_id', 'status'),
+        db.Index('ix_service_requests_service_status', 'service_id', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     service_id = db.Column(db.Integer, db.ForeignKey('services.id'), nullable=False)
-    customer_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False)
+    customer_id = db.Column(db.Integer, db.ForeignKey('user_login.id'), nullable=False, index=True)
     professional_id = db.Column(db.Integer, db.ForeignKey('professionals.id'), nullable=True)
     address_id = db.Column(db.Integer, db.ForeignKey('user_addresses.id'), nullable=False)
-    status = db.Column(db.String(20), nullable=False, default="requested")
+    status = db.Column(db.String(30), nullable=False, default="requested")
     date_of_request = db.Column(db.DateTime(timezone=True), nullable=False)
     date_of_completion = db.Column(db.DateTime(timezone=True), nullable=True)
     rating = db.Column(db.Integer, nullable=True)
     review = db.Column(db.Text, nullable=True)
     total_amount = db.Column(db.Float, nullable=True)
-    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), index=True)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
     # Relationships
@@ -226,15 +343,13 @@ class ServiceRequest(db.Model):
 
     def complete_service(self, rating, review=None):
         """Complete the service request with rating and review"""
+        previous_rating = self.rating if self.status == 'completed' else None
         self.status = 'completed'
         self.date_of_completion = datetime.now(timezone.utc)
         
         
         if self.date_of_request.tzinfo is None:
             self.date_of_request = self.date_of_request.replace(tzinfo=timezone.utc)
-        
-        self.rating = rating
-        self.review = review
 
         duration = (self.date_of_completion - self.date_of_request).total_seconds() / 3600
         total = self.service.base_price * duration
@@ -243,54 +358,352 @@ class ServiceRequest(db.Model):
         else:
             self.total_amount = round(total, 2)
 
+        self.review = review
+        self._set_rating(previous_rating, rating)
+
+    def update_review(self, rating, review=None):
+        """Edit the rating and review of an already completed request"""
+        self.review = review
+        self._set_rating(self.rating, rating)
+
+    def _set_rating(self, previous_rating, rating):
+        self.rating = parse_rating(rating)
+
         # Update average ratings
-        self.service.update_rating()
-        self.professional.update_rating()
+        self.service.apply_rating(previous_rating, self.rating)
+        if self.professional:
+            self.professional.apply_rating(previous_rating, self.rating)
 
 class ServiceStats(db.Model):
+    """Platform-wide counters, kept current by the mapper hooks below.
+
+    Every insert, update and delete of a counted model applies its delta to the
+    single stats row inside the same flush, so reads are O(1). `rebuild` recounts
+    everything from scratch for recovery.
+    """
     __tablename__ = 'service_stats'
 
     id = db.Column(db.Integer, primary_key=True)
     total_users = db.Column(db.Integer, default=0)
     total_professionals = db.Column(db.Integer, default=0)
     total_services = db.Column(db.Integer, default=0)
+    total_requests = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    total_accepted_requests = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     total_completed_requests = db.Column(db.Integer, default=0)
     total_pending_requests = db.Column(db.Integer, default=0)
     total_expired_requests = db.Column(db.Integer, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     avg_rating = db.Column(db.Float, default=0.0)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), 
                           onupdate=lambda: datetime.now(timezone.utc))
 
+    COUNTERS = (
+        'total_users', 'total_professionals', 'total_services',
+        'total_requests', 'total_accepted_requests', 'total_completed_requests',
+        'total_pending_requests', 'total_expired_requests',
+        'rating_sum', 'rating_count',
+    )
+
     @classmethod
     def get_instance(cls):
         stats = cls.query.first()
         if not stats:
-            stats = cls()
-            db.session.add(stats)
-            db.session.commit()
+            # Not seeded yet (see rebuild); report zeros without writing on a read path
+            stats = cls(avg_rating=0.0, **{counter: 0 for counter in cls.COUNTERS})
         return stats
-    
+
+    @property
+    def completion_rate(self):
+        if not self.total_requests:
+            return 0
+        return round((self.total_completed_requests / self.total_requests) * 100, 2)
+
     @classmethod
-    def update_stats(cls):
-        stats = cls.get_instance()
-        
+    def apply_deltas(cls, connection, **deltas):
+        """Add `deltas` to the counters using `connection`'s transaction."""
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        table = cls.__table__
+        values = {table.c[counter]: table.c[counter] + delta for counter, delta in deltas.items()}
+        if 'rating_sum' in deltas or 'rating_count' in deltas:
+            new_sum = table.c.rating_sum + deltas.get('rating_sum', 0)
+            new_count = table.c.rating_count + deltas.get('rating_count', 0)
+            values[table.c.avg_rating] = case(
+                (new_count > 0, func.round(new_sum * 1.0 / new_count, 2)),
+                else_=0.0
+            )
+        connection.execute(table.update().values(values))
+
+    @classmethod
+    def rebuild(cls):
+        """Recount every counter from the source tables and commit."""
+        stats = cls.query.first()
+        if not stats:
+            stats = cls()
+            db.session.add(stats)
+
         stats.total_users = UserLogin.query.filter_by(role='user').count()
         stats.total_professionals = Professional.query.filter_by(is_approved=True).count()
         stats.total_services = Services.query.count()
-        
-        # Update request counts
-        stats.total_completed_requests = ServiceRequest.query.filter_by(status='completed').count()
-        stats.total_pending_requests = ServiceRequest.query.filter_by(status='pending').count()
-        stats.total_expired_requests = ServiceRequest.query.filter_by(status='expired').count()
-        
-        # Calculate average rating
-        completed_requests = db.session.query(
-            func.avg(ServiceRequest.rating).label('avg_rating')
-        ).filter(
-            ServiceRequest.status == 'completed',
-            ServiceRequest.date_of_completion.isnot(None)
-        ).first()
-        
-        stats.avg_rating = round(completed_requests.avg_rating, 2) or 0.0
-        
+
+        # Request counts in one pass over the status index
+        by_status = dict(
+            db.session.query(ServiceRequest.status, func.count(ServiceRequest.id))
+            .group_by(ServiceRequest.status)
+        )
+        stats.total_requests = sum(by_status.values())
+        stats.total_accepted_requests = by_status.get('accepted', 0)
+        stats.total_completed_requests = by_status.get('completed', 0)
+        stats.total_pending_requests = by_status.get('pending', 0)
+        stats.total_expired_requests = by_status.get('expired', 0)
+
+        ratings = db.session.query(
+            func.sum(ServiceRequest.rating),
+            func.count(ServiceRequest.rating)
+        ).filter(*_RATED_COMPLETED).first()
+        stats.rating_sum = ratings[0] or 0
+        stats.rating_count = ratings[1] or 0
+        stats.avg_rating = round(stats.rating_sum / stats.rating_count, 2) if stats.rating_count else 0.0
+
+        db.session.commit()
+        return stats
+
+class DailyServiceRollup(db.Model):
+    """Per-day request totals for each (professional, category), for dashboard charts.
+
+    Rows are keyed by the UTC day the request was created. Requests without a
+    professional are rolled up under professional_id 0. The mapper hooks below
+    move each request's contribution between rows as it changes, so charts read
+    a handful of pre-aggregated rows instead of grouping raw requests.
+    """
+    __tablename__ = 'daily_service_rollups'
+
+    UNASSIGNED = 0
+
+    day = db.Column(db.Date, primary_key=True)
+    professional_id = db.Column(db.Integer, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
+    request_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    COUNTERS = ('request_count', 'completed_count', 'revenue', 'rating_sum', 'rating_count')
+
+    @classmethod
+    def apply_deltas(cls, connection, key, **deltas):
+        """Add `deltas` to the row for `key` (day, professional_id, category_id), creating it if needed."""
+        deltas = {counter: delta for counter, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        table = cls.__table__
+        day, professional_id, category_id = key
+        row = {'day': day, 'professional_id': professional_id, 'category_id': category_id}
+        if connection.dialect.name in ('sqlite', 'postgresql'):
+            # Imported here: the PostgreSQL dialect module alone costs SQLite deployments 35ms at startup
+            dialect = importlib.import_module(f'sqlalchemy.dialects.{connection.dialect.name}')
+            stmt = dialect.insert(table).values(**row, **{counter: deltas.get(counter, 0) for counter in cls.COUNTERS})
+            connection.execute(stmt.on_conflict_do_update(
+                index_elements=list(row),
+                set_={counter: table.c[counter] + stmt.excluded[counter] for counter in deltas}
+            ))
+            return
+
+        matches = [table.c[column] == value for column, value in row.items()]
+        result = connection.execute(
+            table.update().where(*matches).values(
+                {table.c[counter]: table.c[counter] + delta for counter, delta in deltas.items()}
+            )
+        )
+        if not result.rowcount:
+            connection.execute(table.insert().values(**row, **{counter: deltas.get(counter, 0) for counter in cls.COUNTERS}))
+
+    @classmethod
+    def rebuild(cls, start=None, end=None):
+        """Recompute the rollups for days in [start, end] (all days by default) and commit."""
+        day = func.date(ServiceRequest.created_at)
+        professional_id = func.coalesce(ServiceRequest.professional_id, cls.UNASSIGNED)
+        completed = ServiceRequest.status == 'completed'
+        source = select(
+            day,
+            professional_id,
+            Services.category_id,
+            func.count(ServiceRequest.id),
+            func.sum(case((completed, 1), else_=0)),
+            func.sum(case((completed & ServiceRequest.total_amount.isnot(None), ServiceRequest.total_amount), else_=0.0)),
+            func.coalesce(func.sum(ServiceRequest.rating), 0),
+            func.count(ServiceRequest.rating),
+        ).join(
+            Services, Services.id == ServiceRequest.service_id
+        ).group_by(day, professional_id, Services.category_id)
+
+        stale = cls.__table__.delete()
+        if start:
+            source = source.where(day >= start)
+            stale = stale.where(cls.day >= start)
+        if end:
+            source = source.where(day <= end)
+            stale = stale.where(cls.day <= end)
+
+        db.session.execute(stale)
+        rows = db.session.execute(
+            insert(cls.__table__).from_select(['day', 'professional_id', 'category_id', *cls.COUNTERS], source)
+        ).rowcount
         db.session.commit()
+        return rows
+
+    @classmethod
+    def series(cls, start, end, bucket='day', professional_id=None):
+        """Totals per bucket ('day', 'week' or 'month') from `start` to `end` inclusive.
+
+        Returns the bucket labels and one list per counter, aligned with the labels.
+        """
+        query = db.session.query(
+            cls.day, *(func.sum(getattr(cls, counter)) for counter in cls.COUNTERS)
+        ).filter(cls.day >= start, cls.day <= end)
+        if professional_id is not None:
+            query = query.filter(cls.professional_id == professional_id)
+
+        buckets = {}
+        for offset in range((end - start).days + 1):
+            buckets.setdefault(_bucket_start(start + timedelta(days=offset), bucket), len(buckets))
+
+        totals = {counter: [0] * len(buckets) for counter in cls.COUNTERS}
+        for day, *values in query.group_by(cls.day):
+            index = buckets[_bucket_start(day, bucket)]
+            for counter, value in zip(cls.COUNTERS, values):
+                totals[counter][index] += value or 0
+
+        label_format = '%Y-%m' if bucket == 'month' else '%Y-%m-%d'
+        totals['labels'] = [bucket_day.strftime(label_format) for bucket_day in buckets]
+        return totals
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+_RATED_COMPLETED = (
+    ServiceRequest.status == 'completed',
+    ServiceRequest.date_of_completion.isnot(None),
+    ServiceRequest.rating.isnot(None),
+)
+
+# Stats contribution of a single row, given a getter for its column values
+def _user_counters(value):
+    return {'total_users': int(value('role') == 'user')}
+
+def _professional_counters(value):
+    return {'total_professionals': int(bool(value('is_approved')))}
+
+def _service_counters(value):
+    return {'total_services': 1}
+
+def _service_request_counters(value):
+    status = value('status')
+    rated = status == 'completed' and value('date_of_completion') is not None and value('rating') is not None
+    return {
+        'total_requests': 1,
+        'total_accepted_requests': int(status == 'accepted'),
+        'total_completed_requests': int(status == 'completed'),
+        'total_pending_requests': int(status == 'pending'),
+        'total_expired_requests': int(status == 'expired'),
+        'rating_sum': value('rating') if rated else 0,
+        'rating_count': int(rated),
+    }
+
+def _current_value(target):
+    return lambda name: getattr(target, name)
+
+def _previous_value(target):
+    state = db.inspect(target)
+    def value(name):
+        history = state.attrs[name].history
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(target, name)
+    return value
+
+def _load_history(model, columns):
+    # Load the old value when an expired attribute is overwritten, so updates see it in history
+    for column in columns:
+        event.listen(getattr(model, column), 'set', lambda *args: None, active_history=True)
+
+def _track_stats(model, counters, columns=()):
+    _load_history(model, columns)
+
+    @event.listens_for(model, 'after_insert')
+    def after_insert(mapper, connection, target):
+        ServiceStats.apply_deltas(connection, **counters(_current_value(target)))
+
+    @event.listens_for(model, 'after_update')
+    def after_update(mapper, connection, target):
+        before = counters(_previous_value(target))
+        after = counters(_current_value(target))
+        ServiceStats.apply_deltas(connection, **{name: after[name] - before[name] for name in after})
+
+    @event.listens_for(model, 'before_delete')
+    def before_delete(mapper, connection, target):
+        before = counters(_previous_value(target))
+        ServiceStats.apply_deltas(connection, **{name: -delta for name, delta in before.items()})
+
+_track_stats(UserLogin, _user_counters, ['role'])
+_track_stats(Professional, _professional_counters, ['is_approved'])
+_track_stats(Services, _service_counters)
+_track_stats(ServiceRequest, _service_request_counters, ['status', 'rating', 'date_of_completion'])
+
+
+# Daily rollup contribution of a single service request: (key, counters)
+def _rollup_contribution(connection, value):
+    created_at = value('created_at')
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+
+    category_id = connection.execute(
+        select(Services.category_id).where(Services.id == value('service_id'))
+    ).scalar()
+    key = (created_at.date(), value('professional_id') or DailyServiceRollup.UNASSIGNED, category_id)
+
+    completed = value('status') == 'completed'
+    rating = value('rating')
+    return key, {
+        'request_count': 1,
+        'completed_count': int(completed),
+        'revenue': (value('total_amount') or 0.0) if completed else 0.0,
+        'rating_sum': rating or 0,
+        'rating_count': int(rating is not None),
+    }
+
+_ROLLUP_COLUMNS = ('created_at', 'service_id', 'professional_id', 'status', 'total_amount', 'rating')
+_load_history(ServiceRequest, _ROLLUP_COLUMNS)
+
+@event.listens_for(ServiceRequest, 'after_insert')
+def _rollup_insert(mapper, connection, target):
+    key, counters = _rollup_contribution(connection, _current_value(target))
+    DailyServiceRollup.apply_deltas(connection, key, **counters)
+
+@event.listens_for(ServiceRequest, 'after_update')
+def _rollup_update(mapper, connection, target):
+    state = db.inspect(target)
+    if not any(state.attrs[column].history.has_changes() for column in _ROLLUP_COLUMNS):
+        return
+
+    old_key, before = _rollup_contribution(connection, _previous_value(target))
+    new_key, after = _rollup_contribution(connection, _current_value(target))
+    if old_key == new_key:
+        DailyServiceRollup.apply_deltas(connection, new_key, **{name: after[name] - before[name] for name in after})
+    else:
+        DailyServiceRollup.apply_deltas(connection, old_key, **{name: -delta for name, delta in before.items()})
+        DailyServiceRollup.apply_deltas(connection, new_key, **after)
+
+@event.listens_for(ServiceRequest, 'before_delete')
+def _rollup_delete(mapper, connection, target):
+    key, before = _rollup_contribution(connection, _previous_value(target))
+    DailyServiceRollup.apply_deltas(connection, key, **{name: -delta for name, delta in before.items()})
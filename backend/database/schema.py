@@ -0,0 +1,78 @@
+from sqlalchemy import inspect, text
+
+from database.models import db, ServiceStats, DailyServiceRollup, Services, Professional
+
+
+def sync_schema():
+    """Create missing tables and bring existing ones up to the declared models.
+
+    `db.create_all()` only creates tables that don't exist yet, so databases
+    created before a column or index was declared never receive it. This adds
+    every declared column and index that is missing on an existing table.
+    """
+    new_rollups = not inspect(db.engine).has_table(DailyServiceRollup.__tablename__)
+    db.create_all()
+    added_columns = add_missing_columns()
+    create_missing_indexes()
+
+    # Stats are maintained incrementally from here on, seed them once
+    new_counters = any(column.startswith(f'{ServiceStats.__tablename__}.') for column in added_columns)
+    if new_counters or ServiceStats.query.first() is None:
+        ServiceStats.rebuild()
+    if new_rollups:
+        DailyServiceRollup.rebuild()
+
+    # Rating aggregates added to existing rows start at 0, fill them in before the first review moves them
+    for model in (Services, Professional):
+        if any(column.startswith(f'{model.__tablename__}.rating_') for column in added_columns):
+            model.reconcile_ratings()
+            db.session.commit()
+
+
+def add_missing_columns():
+    """Add declared columns missing from existing tables.
+
+    New columns on existing tables must be nullable or carry a server default,
+    otherwise the ALTER cannot fill in the rows that are already there.
+    """
+    inspector = inspect(db.engine)
+    dialect = db.engine.dialect
+    added = []
+
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect)}'
+                if column.server_default is not None:
+                    ddl += f' DEFAULT {column.server_default.arg}'
+                if not column.nullable:
+                    ddl += ' NOT NULL'
+
+                connection.execute(text(ddl))
+                added.append(f'{table.name}.{column.name}')
+
+    return added
+
+
+def create_missing_indexes():
+    inspector = inspect(db.engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+
+    return created
@@ -1,15 +1,23 @@
-from flask import Blueprint, jsonify, request, send_file
-from sqlalchemy import func, and_
+from flask import Blueprint, jsonify, request, send_from_directory, current_app
+from werkzeug.exceptions import NotFound
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from itsdangerous import BadSignature
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
 from functools import wraps
 import os
 
 from database.models import (
     db, UserLogin, UserAddress, Professional, 
-    ServiceRequest, ServiceStats
+    ServiceRequest, ServiceStats, DailyServiceRollup
 )
+from dashboard_cache import cached_dashboard, cache_stats
+from redis_pool import pool_stats
+from assets import send_upload
+from asset_urls import uploads_relative, is_fingerprinted
+from identity import is_admin
+from utils import parse_dashboard_range, keyset_paginate, with_next_cursor, load_export_token
 
 admin_router = Blueprint("admin", __name__)
 
@@ -17,10 +25,7 @@ def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            current_user_id = get_jwt_identity()
-            user = UserLogin.query.get(current_user_id)
-        
-            if not user or user.role != 'admin':
+            if not is_admin():
                 return jsonify({"message": "Admin access required"}), 403
             return fn(*args, **kwargs)
         return decorator
@@ -30,81 +35,41 @@ def admin_required():
 @jwt_required()
 @admin_required()
 def dashboard():
+    # Requests and revenue per bucket, ?start=&end=&bucket=day|week|month
+    try:
+        start, end, bucket = parse_dashboard_range(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    payload = cached_dashboard('admin', (start, end, bucket), lambda: admin_dashboard_data(start, end, bucket))
+    return jsonify(payload)
 
+def admin_dashboard_data(start, end, bucket):
     service_stats = ServiceStats.get_instance()
     
     # stats
     stats = {
-        'totalRequests': ServiceRequest.query.count(),
-        'activeServices': ServiceRequest.query.filter_by(
-                            status='accepted'
-                        ).count(),
-        'completionRate': calculate_completion_rate(),
+        'totalRequests': service_stats.total_requests,
+        'activeServices': service_stats.total_accepted_requests,
+        'completionRate': service_stats.completion_rate,
         'avg_rating': service_stats.avg_rating,
     }
-    
-    # Calculate past 7 days service requests and revenue
-    service_data = get_past_seven_days_admin_data()
-    return jsonify({
-        'stats': stats,
-        'serviceData': service_data['service_requests'],
-        'revenueData': service_data['revenue'],
-        'days': service_data['days']
-    })
-
-def calculate_completion_rate():
-    total_requests = ServiceRequest.query.count()
-    completed_requests = ServiceRequest.query.filter_by(
-        status='completed'
-    ).count()
-
-    if total_requests == 0:
-        return 0
-    
-    return round((completed_requests / total_requests) * 100, 2)
-
-def get_past_seven_days_admin_data():
-    current_time = datetime.now(timezone.utc)
-    seven_days_ago = current_time - timedelta(days=7)
-    
-    daily_requests = db.session.query(
-        func.date(ServiceRequest.created_at).label('day'),
-        func.count(ServiceRequest.id).label('request_count')
-    ).filter(
-        ServiceRequest.created_at >= seven_days_ago
-    ).group_by('day').order_by('day').all()
-    
-    daily_revenue = db.session.query(
-        func.date(ServiceRequest.created_at).label('day'),
-        func.sum(ServiceRequest.total_amount).label('total_revenue')
-    ).filter(
-        and_(
-            ServiceRequest.created_at>= seven_days_ago,
-            ServiceRequest.status == 'completed',
-            ServiceRequest.total_amount.isnot(None)
-        )
-    ).group_by('day').order_by('day').all()
 
-    days = [(current_time - timedelta(days=x)).date() for x in range(6, -1, -1)]
-    service_requests = [0] * 7
-    revenue = [0.0] * 7
-    
-    for day, count in daily_requests:
-        day_date = datetime.strptime(day, '%Y-%m-%d').date()
-        if day_date in days:
-            service_requests[days.index(day_date)] = count
-    
-    for day, daily_total in daily_revenue:
-        day_date = datetime.strptime(day, '%Y-%m-%d').date()
-        if day_date in days:
-            revenue[days.index(day_date)] = round(daily_total or 0, 2)
-    
+    series = DailyServiceRollup.series(start, end, bucket)
     return {
-        'service_requests': service_requests,
-        'revenue': revenue,
-        'days': [day.strftime('%Y-%m-%d') for day in days]
+        'stats': stats,
+        'serviceData': series['request_count'],
+        'revenueData': [round(revenue, 2) for revenue in series['revenue']],
+        'days': series['labels'],
+        'bucket': bucket
     }
 
+@admin_router.route("/cache-stats", endpoint="admin-cache-stats")
+@jwt_required()
+@admin_required()
+def get_cache_stats():
+    return jsonify({'dashboards': cache_stats(), 'redis_pool': pool_stats()}), 200
+
 # User-related routes
 @admin_router.route("/users", endpoint="admin-get-users")
 @jwt_required()
@@ -116,8 +81,12 @@ def get_users():
         if not user:
             return jsonify({"message": "User not found"}), 404
         return jsonify(user.to_dict())
-    users = UserLogin.query.all()
-    return jsonify([user.to_dict() for user in users])
+
+    try:
+        users, next_cursor = keyset_paginate(UserLogin.query, UserLogin.id, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+    return with_next_cursor(jsonify([user.to_dict() for user in users]), next_cursor)
  
 
 @admin_router.route("/users/<int:user_id>/ban-status", endpoint="ban-user", methods=['PATCH'])
@@ -185,12 +154,20 @@ def get_professional_resume(user_id):
     if not professional or not professional.resume_path:
         return jsonify({"message": "Resume not found"}), 404
     
+    resume = uploads_relative(professional.resume_path)
+    if resume is None:
+        return jsonify({"message": "Resume not found"}), 404
+
     try:
-        return send_file(
-            professional.resume_path,
-            as_attachment=True,
-            download_name=f"resume_{user_id}.pdf"
+        # Supports conditional and Range requests, sent by the proxy when offloading is configured
+        return send_upload(
+            resume,
+            immutable=is_fingerprinted(resume),
+            private=True,
+            download_name=f"resume_{user_id}{os.path.splitext(resume)[1]}"
         )
+    except NotFound:
+        return jsonify({"message": "Resume not found"}), 404
     except Exception as e:
         return jsonify({"message": "Error retrieving resume", "error": str(e)}), 500
 
@@ -203,23 +180,71 @@ def professionals_reviews(user_id):
     if not professional:
         return jsonify({"message": f"No Professional found with id: {user_id}"}), 404
     
-    service_requests = ServiceRequest.query.filter_by(professional_id=professional.id).all()
-    return jsonify([{
-        **request.to_dict(),
-        "review": request.review,
-        "service_name": request.service.name,
-        "customer_name": request.customer.name
-    } for request in service_requests])
+    query = ServiceRequest.query.filter_by(professional_id=professional.id).options(
+        joinedload(ServiceRequest.service),
+        joinedload(ServiceRequest.customer)
+    )
+    try:
+        service_requests, next_cursor = keyset_paginate(query, ServiceRequest.id, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    return with_next_cursor(jsonify([{
+        **service_request.to_dict(),
+        "review": service_request.review,
+        "service_name": service_request.service.name,
+        "customer_name": service_request.customer.name
+    } for service_request in service_requests]), next_cursor)
 
 @admin_router.route("/exportServiceRequest", endpoint="export_service_request")
 @jwt_required()
 @admin_required()
 def exportServiceRequest():
-    from celery_task import export_service_requests_to_csv
-    user = UserLogin.query.get(get_jwt_identity())
-    export_service_requests_to_csv.delay(user.email)
+    from celery_task import export_service_requests_to_csv, export_service_requests_to_parquet
+    exporters = {
+        'csv': export_service_requests_to_csv,
+        'parquet': export_service_requests_to_parquet,
+    }
+
+    # Optional: ?format=csv|parquet&status=<status|all>&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    export_format = request.args.get('format', 'csv')
+    if export_format not in exporters:
+        return jsonify({"message": f"Unsupported export format: {export_format}"}), 400
 
-    return jsonify({"message": "Monthly report scheduled"}), 200
+    status = request.args.get('status', 'completed')
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    try:
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({"message": "Dates must be in YYYY-MM-DD format"}), 400
+
+    user = UserLogin.query.get(get_jwt_identity())
+    exporters[export_format].delay(
+        user.email,
+        status=None if status == 'all' else status,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+    return jsonify({"message": "Export scheduled, a download link will be emailed to you"}), 200
+
+@admin_router.route("/exports/<token>", endpoint="download_export")
+def download_export(token):
+    # The signed, expiring token emailed to the admin is the credential here
+    try:
+        filename = load_export_token(token)
+    except BadSignature:
+        return jsonify({"message": "Download link is invalid or has expired"}), 404
+
+    return send_from_directory(
+        current_app.config['EXPORT_FOLDER'],
+        filename,
+        as_attachment=True,
+        mimetype='application/vnd.apache.parquet' if filename.endswith('.parquet') else 'application/gzip'
+    )
 
 
 # Professional verification routes
@@ -1,9 +1,10 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import create_access_token, create_refresh_token , jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from database.models import db, UserLogin, UserAddress
 from forms import RegistrationForm, LoginForm, ResetPasswordForm
-from utils import generate_otp, store_otp, get_stored_otp, send_otp_email
+from utils import generate_otp, store_otp, get_stored_otp, otp_rate_limit, OTP_TTL
+from identity import create_tokens, load_identity
 
 auth_router = Blueprint("auth", __name__)
 
@@ -32,8 +33,7 @@ def register():
         # Add user to database and login
         db.session.add(new_user)
         db.session.commit()
-        access_token = create_access_token(identity = new_user.id)
-        refresh_token = create_refresh_token(identity = new_user.id)
+        access_token, refresh_token = create_tokens(new_user.id)
         return jsonify({
             "message": "User registered successfully",
             "access_token": access_token,
@@ -68,8 +68,7 @@ def login():
 
         # Validate user credentials and login
         if user and user.check_password(password):
-            access_token = create_access_token(identity = user.id)
-            refresh_token = create_refresh_token(identity = user.id)
+            access_token, refresh_token = create_tokens(user.id)
             return jsonify({
                 "message": "Login successful",
                 "access_token": access_token,
@@ -114,8 +113,7 @@ def google_login():
             db.session.add(user)
             db.session.commit()
 
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = create_tokens(user.id)
 
         return jsonify({
             "message": "Login successful",
@@ -181,6 +179,15 @@ def resend_otp():
             "message": "Missing email or verification type",
         }), 400
 
+    # Limit OTP requests per client and per address before doing any work
+    retry_after = otp_rate_limit(email, request.remote_addr)
+    if retry_after:
+        response = jsonify({
+            "message": "Too many OTP requests. Please try again later.",
+        })
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+
     # Check if user exists
     user = UserLogin.query.filter_by(email=email).first()
     if not user:
@@ -193,10 +200,12 @@ def resend_otp():
     # Store new OTP
     store_otp(email, new_otp, verification_type)
     
+    # Delivered by the OTP worker; a code that can't be sent before it expires is dropped
+    from celery_task import send_otp
     try:
-        send_otp_email(email, new_otp)
+        send_otp.apply_async((email, new_otp), expires=OTP_TTL)
     except Exception as e:
-        print(f"Email sending failed: {str(e)}")
+        print(f"Queueing OTP email failed: {str(e)}")
         return jsonify({
             "message": "Failed to send OTP. Please try again.",
         }), 500
@@ -253,7 +262,11 @@ def profile():
 def refresh_access():
     try:
         identity = get_jwt_identity()
-        new_access_token = create_access_token(identity = identity)
+        if load_identity(identity) is None:
+            return jsonify({"message": "User not found"}), 401
+
+        # Claims are re-read so role or ban changes reach the new token
+        new_access_token, _ = create_tokens(identity)
         return jsonify({"access_token": new_access_token})
     except Exception as e:
         return jsonify({ 'message': 'An unexpected error occurred', 'error': str(e) }), 500
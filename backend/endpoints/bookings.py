@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 import flask 
 from sqlalchemy import and_
+from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime, timezone
@@ -9,8 +10,11 @@ from database.models import (db,
                             UserAddress, 
                             Professional, 
                             Services,
-                            ServiceRequest)
+                            ServiceRequest,
+                            parse_rating)
 from forms import BookingRequestForm
+from utils import keyset_paginate, with_next_cursor
+from serviceability import professional_counts
 
 
 bookings_router = Blueprint("bookings", __name__)
@@ -21,44 +25,55 @@ def check_serviceability():
     service_ids = request.args.get('serviceIds', '').split(',')
     
     try:
+        # Convert service_ids to integers
+        service_ids = list(dict.fromkeys(int(sid) for sid in service_ids if sid.strip()))
+
         if not pincode or not service_ids:
             return jsonify({
                 'serviceable': False, 
                 'message': 'Invalid pincode or services'
             }), 400
         
-        # Convert service_ids to integers
-        service_ids = [int(sid) for sid in service_ids if sid.strip()]
-        
-        # Check serviceability for each service
-        serviceable_services = []
+        # Resolve every service's category in one query, then every category's
+        # professionals in the pincode in one Redis round trip
+        categories = dict(
+            db.session.query(Services.id, Services.category_id)
+            .filter(Services.id.in_(service_ids))
+        )
+        counts = professional_counts(categories.values(), pincode)
+
+        services = []
         for service_id in service_ids:
-            service = Services.query.get(service_id)
-            if not service:
-                return jsonify({
-                    'serviceable': False, 
+            if service_id not in categories:
+                services.append({
+                    'service_id': service_id,
+                    'serviceable': False,
                     'message': f'Service {service_id} not found'
-                }), 400
-            
-            professional_exists = Professional.query.join(UserLogin) \
-                .join(UserAddress) \
-                .filter(
-                    Professional.category_id == service.category_id,
-                    Professional.is_approved == True,
-                    UserAddress.zip_code == pincode
-                ).first()
-            
-            if not professional_exists:
-                return jsonify({
-                    'serviceable': False, 
+                })
+            elif not counts[categories[service_id]]:
+                services.append({
+                    'service_id': service_id,
+                    'serviceable': False,
                     'message': f'No professionals available for service {service_id} in pincode {pincode}'
-                }), 400
-            
-            serviceable_services.append(service_id)
+                })
+            else:
+                services.append({'service_id': service_id, 'serviceable': True})
+
+        serviceable_services = [service['service_id'] for service in services if service['serviceable']]
+        unavailable = [service for service in services if not service['serviceable']]
+
+        if unavailable:
+            return jsonify({
+                'serviceable': False, 
+                'serviceable_services': serviceable_services,
+                'services': services,
+                'message': unavailable[0]['message']
+            }), 400
 
         return jsonify({
             'serviceable': True, 
             'serviceable_services': serviceable_services,
+            'services': services,
             'message': 'Services are available in this area'
         })
     
@@ -155,10 +170,18 @@ def create_booking():
 def get_bookings():
     current_user_id = get_jwt_identity()
 
-    # Base qury
-    query = ServiceRequest.query.filter_by(customer_id=current_user_id)
+    # Base qury, loading every relationship the listing touches in the same query
+    query = ServiceRequest.query.filter_by(customer_id=current_user_id).options(
+        joinedload(ServiceRequest.service),
+        joinedload(ServiceRequest.address),
+        joinedload(ServiceRequest.customer),
+        joinedload(ServiceRequest.professional).joinedload(Professional.user_login)
+    )
 
-    service_requests = query.all()
+    try:
+        service_requests, next_cursor = keyset_paginate(query, ServiceRequest.id, flask.request.args)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
     booking_details = []
     for request in service_requests:
@@ -192,7 +215,7 @@ def get_bookings():
         
         booking_details.append(booking_info)
     
-    return booking_details, 200
+    return with_next_cursor(jsonify(booking_details), next_cursor), 200
     
 @bookings_router.route('/submit_review', methods=['POST'])
 @jwt_required()
@@ -200,8 +223,11 @@ def submit_review():
     current_user_id = get_jwt_identity()
     data = request.get_json()
     service_request_id = data.get('service_request_id')
-    rating = data.get('rating')
     review_text = data.get('review')
+    try:
+        rating = parse_rating(data.get('rating'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     
     service_request = ServiceRequest.query.filter_by(
         id=service_request_id, 
@@ -214,13 +240,8 @@ def submit_review():
     if service_request.status != 'completed':
         return jsonify({'message': 'Can only review completed services'}), 400
     
-    # Update review
-    service_request.rating = rating
-    service_request.review = review_text
-    
-    # Update ratings
-    service_request.service.update_rating()
-    service_request.professional.update_rating()
+    # Update review and ratings
+    service_request.update_review(rating=rating, review=review_text)
     
     db.session.commit()
     
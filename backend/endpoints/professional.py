@@ -1,33 +1,29 @@
 from flask import Blueprint, jsonify, request
 import flask
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-from sqlalchemy import desc, func
+from werkzeug.exceptions import RequestEntityTooLarge
+from sqlalchemy.orm import joinedload
 import os
-from datetime import datetime, timezone, timedelta
 
-from database.models import db, UserLogin, UserAddress, Professional, Category, ServiceRequest
-from utils import redis_client
+from database.models import db, UserLogin, UserAddress, Professional, Category, ServiceRequest, DailyServiceRollup, parse_rating
+from utils import redis_client, parse_dashboard_range, keyset_paginate, with_next_cursor, store_upload, UploadTooLarge
+from serviceability import professional_count
+from dashboard_cache import cached_dashboard
+from identity import current_professional_id
 
 professional_router = Blueprint("professional", __name__)
 
 # Configure file upload
 UPLOAD_FOLDER = 'static/uploads/resumes'
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
+RESUME_MAX_BYTES = int(os.environ.get('RESUME_MAX_BYTES', 5 * 1024 * 1024))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def save_resume(file):
-    if not os.path.exists(UPLOAD_FOLDER):
-        os.makedirs(UPLOAD_FOLDER)
-    
-    filename = secure_filename(file.filename)
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    unique_filename = f"{timestamp}_{filename}"
-    file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
-    file.save(file_path)
-    return file_path
+    """Stream the resume to disk under its content hash, raising UploadTooLarge past the cap."""
+    return store_upload(file, UPLOAD_FOLDER, max_bytes=RESUME_MAX_BYTES)
 
 @professional_router.route("/signup", methods=["POST"])
 @jwt_required()
@@ -57,7 +53,10 @@ def professional_signup():
             return jsonify({"message": "Invalid file type. Allowed types: PDF, DOC, DOCX"}), 400
             
         # Save the resume file
-        resume_path = save_resume(resume_file)
+        try:
+            resume_path = save_resume(resume_file)
+        except UploadTooLarge as e:
+            return jsonify({"message": str(e)}), 413
 
         # Create address
         address = UserAddress(
@@ -121,10 +120,13 @@ def professional_signup():
 
         except Exception as e:
             db.session.rollback()
-            if os.path.exists(resume_path):
+            # Identical resumes share one file, keep it if another profile uses it
+            if os.path.exists(resume_path) and not Professional.query.filter_by(resume_path=resume_path).first():
                 os.remove(resume_path)
             return jsonify({"message": "Database error occurred", "error": str(e)}), 500
 
+    except RequestEntityTooLarge:
+        return jsonify({"message": "Upload is too large"}), 413
     except Exception as e:
         print(e)
         return jsonify({"message": "An error occurred", "error": str(e)}), 500
@@ -150,8 +152,7 @@ def check_status():
 @professional_router.route('/service_actions', methods=['POST'])
 @jwt_required()
 def service_actions():
-    current_user = UserLogin.query.get(get_jwt_identity())
-    professional = Professional.query.filter_by(user_login_id=current_user.id).first()
+    professional_id = current_professional_id()
     
     data = request.get_json()
     service_request_id = data.get('service_request_id')
@@ -164,34 +165,31 @@ def service_actions():
     
     if action == 'accept':
 
-        if not professional:
+        if not professional_id:
             return jsonify({'message': 'Not a registered professional'}), 403
         # Check if service status pending
         if service_request.status != 'pending':
             return jsonify({'message': 'Service request cannot be accepted'}), 400
         
-        service_request.professional_id = professional.id
+        service_request.professional_id = professional_id
         service_request.status = 'accepted'
         
         # Clear any previous rejections in Redis
         redis_client.delete(f'service_request_rejections:{service_request_id}')
     
     elif action == 'reject':
-        if not professional:
+        if not professional_id:
             return jsonify({'message': 'Not a registered professional'}), 403
         
         # Track rejections in Redis
         key = f'service_request_rejections:{service_request_id}'
-        redis_client.sadd(key, professional.id)
+        redis_client.sadd(key, professional_id)
         
         # Check total rejections
-        total_professionals_in_area = Professional.query.join(UserLogin) \
-            .join(UserAddress) \
-            .filter(
-                Professional.category_id == service_request.service.category_id,
-                Professional.is_approved == True,
-                UserAddress.zip_code == service_request.address.zip_code
-            ).count()
+        total_professionals_in_area = professional_count(
+            service_request.service.category_id,
+            service_request.address.zip_code
+        )
         
         rejected_count = redis_client.scard(key)
         
@@ -200,8 +198,11 @@ def service_actions():
     
     elif action == 'completed':
         # Validate completion
-        if service_request.customer_id == get_jwt_identity() or service_request.professional_id == professional.id:
-            rating = data.get('rating')
+        if service_request.customer_id == get_jwt_identity() or service_request.professional_id == professional_id:
+            try:
+                rating = parse_rating(data.get('rating'))
+            except ValueError as e:
+                return jsonify({'message': str(e)}), 400
             review = data.get('review')
             
             service_request.complete_service(rating=rating, review=review)
@@ -209,8 +210,8 @@ def service_actions():
             return jsonify({'message': 'Not authorized to complete this service'}), 403
     
     elif action == "canceled":
-        if professional:
-            if service_request.professional_id == professional.id:
+        if professional_id:
+            if service_request.professional_id == professional_id:
                 service_request.status = 'canceled by professional'
         elif service_request.customer_id == get_jwt_identity():
             service_request.status = 'canceled by customer'
@@ -253,8 +254,12 @@ def get_professional_bookings():
         if not professional_address:
             return jsonify({"message": "Professional address not found"}), 404
 
-        # Base query
-        query = ServiceRequest.query
+        # Base query, loading every relationship the listing touches in the same query
+        query = ServiceRequest.query.options(
+            joinedload(ServiceRequest.service),
+            joinedload(ServiceRequest.address),
+            joinedload(ServiceRequest.customer)
+        )
 
         # Filter based on request type
         if type == 'pending_request':
@@ -275,7 +280,7 @@ def get_professional_bookings():
                 ServiceRequest.professional_id == professional.id
                 )
 
-        service_requests = query.order_by(desc(ServiceRequest.updated_at)).all()
+        service_requests, next_cursor = keyset_paginate(query, ServiceRequest.id, flask.request.args)
         
         booking_details = []
         for request in service_requests:
@@ -302,7 +307,9 @@ def get_professional_bookings():
                 }
             
             booking_details.append(booking_info)
-        return jsonify({type: booking_details}), 200
+        return with_next_cursor(jsonify({type: booking_details}), next_cursor), 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(e)
         return jsonify({"message": "An error occurred", "error": str(e)}), 500
@@ -316,7 +323,21 @@ def get_professional_dashboard():
     
     if not professional:
         return jsonify({"error": "Professional not found"}), 404
-    
+
+    # Requests and average rating per bucket, ?start=&end=&bucket=day|week|month
+    try:
+        start, end, bucket = parse_dashboard_range(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    payload = cached_dashboard(
+        f'professional:{professional.id}',
+        (start, end, bucket),
+        lambda: professional_dashboard_data(professional, start, end, bucket)
+    )
+    return jsonify(payload)
+
+def professional_dashboard_data(professional, start, end, bucket):
     # Professional stats
     stats = {
         'avg_rating': professional.avg_rating,
@@ -327,15 +348,19 @@ def get_professional_dashboard():
         ).count(),
         'completionRate': calculate_completion_rate(professional.id)
     }
-    
-    # Calculate weekly service requests and ratings
-    service_data = get_past_seven_days_service_data(professional.id)
-    return jsonify({
+
+    series = DailyServiceRollup.series(start, end, bucket, professional_id=professional.id)
+    ratings = [
+        round(rating_sum / rating_count, 2) if rating_count else 0
+        for rating_sum, rating_count in zip(series['rating_sum'], series['rating_count'])
+    ]
+    return {
         'stats': stats,
-        'serviceData': service_data['service_requests'],
-        'revenueData': service_data['ratings'],
-        'days': service_data['days']
-    })
+        'serviceData': series['request_count'],
+        'revenueData': ratings,
+        'days': series['labels'],
+        'bucket': bucket
+    }
 
 def calculate_completion_rate(professional_id):
     total_requests = ServiceRequest.query.filter_by(professional_id=professional_id).count()
@@ -349,46 +374,3 @@ def calculate_completion_rate(professional_id):
     
     return round((completed_requests / total_requests) * 100, 2)
 
-def get_past_seven_days_service_data(professional_id):
-    current_time = datetime.now(timezone.utc)
-    seven_days_ago = current_time - timedelta(days=7)
-    # Get daily service requests
-    daily_requests = db.session.query(
-        func.date(ServiceRequest.created_at).label('day'),
-        func.count(ServiceRequest.id).label('request_count')
-    ).filter(
-        ServiceRequest.professional_id == professional_id,
-        ServiceRequest.created_at >= seven_days_ago
-    ).group_by('day').order_by('day').all()
-
-    # Daily rating
-    daily_ratings = db.session.query(
-        func.date(ServiceRequest.created_at).label('day'),
-        func.avg(ServiceRequest.rating).label('avg_rating')
-    ).filter(
-        ServiceRequest.professional_id == professional_id,
-        ServiceRequest.rating.isnot(None),
-        ServiceRequest.created_at >= seven_days_ago
-    ).group_by('day').order_by('day').all()
-
-    
-    days = [(current_time - timedelta(days=x)).date() for x in range(6, -1, -1)]
-    
-    service_requests = [0] * 7
-    ratings = [0] * 7
-
-    for day, count in daily_requests:
-        day_date = datetime.strptime(day, '%Y-%m-%d').date()
-        if day_date in days:
-            service_requests[days.index(day_date)] = count
-    
-    for day, rating in daily_ratings:
-        day_date = datetime.strptime(day, '%Y-%m-%d').date()
-        if day_date in days:
-            ratings[days.index(day_date)] = round(rating, 2)
-    
-    return {
-        'service_requests': service_requests,
-        'ratings': ratings,
-        'days': [day.strftime('%Y-%m-%d') for day in days]
-    }
\ No newline at end of file
@@ -4,12 +4,13 @@ from sqlalchemy import or_
 from sqlalchemy.exc import SQLAlchemyError
 import os
 from functools import wraps
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 
-from database.models import db, UserLogin, UserAddress, Professional, Services, Category
+from database.models import db, UserAddress, Professional, Services, Category
 from forms import ServiceForm
-from utils import handle_image_upload, handle_image_delete
-from cache import cache
+from utils import handle_image_upload, handle_image_delete, keyset_paginate, upload_path, SERVICE_IMAGE_FOLDER
+from catalog_cache import catalog_response
+from identity import is_admin
 
 
 service_router = Blueprint("service", __name__)
@@ -18,27 +19,47 @@ service_router = Blueprint("service", __name__)
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = UserLogin.query.get(current_user_id)
-        
-        if not user or user.role != 'admin':
+        if not is_admin():
             return jsonify({"message": "Admin access required"}), 403
         return f(*args, **kwargs)
     return decorated_function
 
 
 
+def release_image(path, variants):
+    """Delete an uploaded image and its variants once no service uses it any more.
+
+    Images are stored by content hash, so services with identical uploads
+    share one file.
+    """
+    if not path or not upload_path(path).startswith(SERVICE_IMAGE_FOLDER):
+        return
+    if Services.query.filter_by(img=path).first():
+        return
+
+    handle_image_delete(upload_path(path))
+    for variant in variants or []:
+        handle_image_delete(variant['webp'])
+        handle_image_delete(variant['jpeg'])
+
+
 @service_router.route("/services/categories", methods=['GET'])
-@cache.cached(timeout=60, key_prefix='categories')
 def get_categories():
-    categories = Category.query.all()
-    return jsonify([category.to_dict() for category in categories])
+    def build():
+        categories = Category.query.all()
+        return [category.to_dict() for category in categories], None
+    return catalog_response('categories', build)
 
 @service_router.route("/services", methods=['GET'])
-@cache.cached(timeout=60, key_prefix='services')
 def get_services():
-    services = Services.query.all()
-    return jsonify([service.to_dict() for service in services])
+    def build():
+        services, next_cursor = keyset_paginate(Services.query, Services.id, request.args, descending=False)
+        return [service.to_dict() for service in services], next_cursor
+
+    try:
+        return catalog_response('services', build)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
 
 
 @service_router.route("/services", methods=['POST', 'PUT'])
@@ -80,10 +101,16 @@ def create_or_update_service():
             service.time_required = form.time_required.data
             service.category_id = category_id
             
-            # Handle image upload
+            # Handle image upload, keeping the replaced image until the commit succeeded
+            image_changed, previous_img = False, None
             if 'img' in request.files and request.files['img'].filename:
-                new_path = handle_image_upload(request.files['img'], service_id)
-                service.img = new_path
+                new_path = handle_image_upload(request.files['img'])
+                if new_path and new_path != service.img:
+                    # A new service has no image of its own to release yet
+                    image_changed = True
+                    previous_img, previous_variants = service.img, service.img_variants
+                    service.img = new_path
+                    service.img_variants = None
             
             # Handle tags
             tags_data = request.form.get('tags')
@@ -94,6 +121,13 @@ def create_or_update_service():
                 db.session.add(service)
             
             db.session.commit()
+
+            if image_changed:
+                from celery_task import generate_image_variants
+                generate_image_variants.delay(service.id)
+            if previous_img is not None:
+                release_image(previous_img, previous_variants)
+
             return jsonify(service.to_dict()), 200 if service_id else 201
             
         return jsonify({"message": "Validation error", "errors": form.errors}), 422
@@ -113,14 +147,10 @@ def delete_service(service_id):
         if not service:
             return jsonify({"message": "Service not found"}), 404
         
-        if service.img:
-            try:
-                handle_image_delete(service.img)
-            except OSError:
-                pass 
-        
         db.session.delete(service)
         db.session.commit()
+
+        release_image(service.img, service.img_variants)
         
         return jsonify({"message": "Service deleted successfully"}), 200
         
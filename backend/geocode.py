@@ -0,0 +1,136 @@
+"""Reverse geocoding through the Ola Maps API, cached per geohash cell.
+
+Coordinates are snapped to the centre of their geohash cell at
+`GEOCODE_PRECISION` characters (7 is roughly 150m x 150m), so nearby lookups
+share one cached result in Redis. Upstream calls go through one pooled
+session with timeouts and retries, and concurrent misses on the same cell are
+coalesced: one caller fetches while the others wait for its result.
+"""
+import json
+import os
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import redis_client
+
+REVERSE_GEOCODE_URL = 'https://api.olamaps.io/places/v1/reverse-geocode'
+
+GEOCODE_PRECISION = int(os.environ.get('GEOCODE_PRECISION', 7))
+GEOCODE_CACHE_TTL = int(os.environ.get('GEOCODE_CACHE_TTL', 60 * 60 * 24 * 7))
+GEOCODE_CONNECT_TIMEOUT = float(os.environ.get('GEOCODE_CONNECT_TIMEOUT', 2))
+GEOCODE_READ_TIMEOUT = float(os.environ.get('GEOCODE_READ_TIMEOUT', 5))
+GEOCODE_POOL_SIZE = int(os.environ.get('GEOCODE_POOL_SIZE', 10))
+
+# Waiters give up on the fetching caller after the worst case of its request
+LOCK_TIMEOUT = GEOCODE_CONNECT_TIMEOUT + GEOCODE_READ_TIMEOUT * 3
+LOCK_POLL_INTERVAL = 0.05
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+_session = None
+
+
+def geohash(latitude, longitude, precision=GEOCODE_PRECISION):
+    """Geohash of a coordinate, `precision` characters long."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        value, bounds = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+def geohash_center(cell):
+    """(latitude, longitude) of the centre of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            middle = (bounds[0] + bounds[1]) / 2
+            if bits >> shift & 1:
+                bounds[0] = middle
+            else:
+                bounds[1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+def http_session():
+    """Process-wide session: keeps connections to the API alive between lookups."""
+    global _session
+    if _session is None:
+        retry = Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=('GET',)
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=GEOCODE_POOL_SIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _session = session
+    return _session
+
+def _fetch(latitude, longitude, api_key):
+    response = http_session().get(
+        REVERSE_GEOCODE_URL,
+        params={'latlng': f'{latitude},{longitude}', 'api_key': api_key},
+        timeout=(GEOCODE_CONNECT_TIMEOUT, GEOCODE_READ_TIMEOUT)
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def reverse_geocode(latitude, longitude, api_key):
+    """Reverse-geocode the geohash cell containing the coordinate.
+
+    Raises requests.RequestException when the upstream call fails; failures
+    are never cached.
+    """
+    cell = geohash(latitude, longitude)
+    key = f'geocode:{cell}'
+
+    cached = redis_client.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    lock_key = f'geocode:lock:{cell}'
+    token = uuid.uuid4().hex
+    if not redis_client.set(lock_key, token, nx=True, px=int(LOCK_TIMEOUT * 1000)):
+        # Another caller is fetching this cell, wait for its result
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            cached = redis_client.get(key)
+            if cached is not None:
+                return json.loads(cached)
+            if not redis_client.exists(lock_key):
+                break
+        # It failed or timed out, fetch ourselves rather than fail with it
+
+    try:
+        result = _fetch(*geohash_center(cell), api_key)
+        redis_client.set(key, json.dumps(result), ex=GEOCODE_CACHE_TTL)
+        return result
+    finally:
+        if redis_client.get(lock_key) == token.encode():
+            redis_client.delete(lock_key)
@@ -0,0 +1,123 @@
+"""Who the caller is, without a database query per request.
+
+Access tokens carry the user's role, ban status and professional ID as
+claims, so authorization decisions can be made from the token alone. Where
+fresher data matters, `current_user` (set up by the JWT user lookup) is a
+`CurrentIdentity` that reads a snapshot of the user from a short-TTL cache on
+first use. Committed role, ban or professional profile changes drop the
+snapshot, so the next lookup sees them immediately.
+"""
+import os
+
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, current_user
+
+from cache import cache
+from commit_hooks import after_commit
+from database.models import db, UserLogin, Professional
+
+IDENTITY_CACHE_TIMEOUT = int(os.environ.get('IDENTITY_CACHE_TIMEOUT', 60))
+
+
+def _cache_key(user_id):
+    return f'identity:{user_id}'
+
+def load_identity(user_id):
+    """Snapshot of the claims-relevant user fields, or None if the user doesn't exist."""
+    key = _cache_key(user_id)
+    identity = cache.get(key)
+    if identity is not None:
+        return identity
+
+    row = db.session.query(
+        UserLogin.id, UserLogin.role, UserLogin.is_banned, Professional.id
+    ).outerjoin(
+        Professional, Professional.user_login_id == UserLogin.id
+    ).filter(UserLogin.id == user_id).first()
+    if row is None:
+        return None
+
+    identity = {
+        'id': row[0],
+        'role': row[1],
+        'is_banned': bool(row[2]),
+        'professional_id': row[3],
+    }
+    cache.set(key, identity, timeout=IDENTITY_CACHE_TIMEOUT)
+    return identity
+
+def create_tokens(user_id):
+    """(access_token, refresh_token) for a user, the access token carrying its identity claims."""
+    identity = load_identity(user_id)
+    claims = {name: identity[name] for name in ('role', 'is_banned', 'professional_id')}
+    return (
+        create_access_token(identity=user_id, additional_claims=claims),
+        create_refresh_token(identity=user_id)
+    )
+
+
+class CurrentIdentity:
+    """The token's user, loaded from the identity cache on first attribute access."""
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self._identity = None
+        self._loaded = False
+
+    def _load(self):
+        if not self._loaded:
+            self._identity = load_identity(self.id)
+            self._loaded = True
+        return self._identity
+
+    @property
+    def exists(self):
+        return self._load() is not None
+
+    def __getattr__(self, name):
+        identity = self._load()
+        if identity is None or name not in identity:
+            raise AttributeError(name)
+        return identity[name]
+
+
+def is_admin():
+    """Whether the caller is a current, unbanned admin.
+
+    The token claims turn away everyone else without any lookup; admins are
+    then confirmed against the cached identity so a revoked role or a ban
+    takes effect before their token expires.
+    """
+    claims = get_jwt()
+    # Tokens issued before the claims existed go straight to the identity check
+    if claims.get('role', 'admin') != 'admin' or claims.get('is_banned'):
+        return False
+    return current_user.exists and current_user.role == 'admin' and not current_user.is_banned
+
+def current_professional_id():
+    """ID of the caller's professional profile, or None.
+
+    Tokens issued before the profile existed (or before the claim was added)
+    fall back to the cached identity.
+    """
+    professional_id = get_jwt().get('professional_id')
+    if professional_id is not None:
+        return professional_id
+    return current_user.professional_id if current_user.exists else None
+
+
+# Users whose role, ban status or professional profile a committed write changed
+def _identity_writes(session, obj):
+    state = db.inspect(obj)
+    if isinstance(obj, UserLogin):
+        if obj in session.deleted or (obj in session.dirty and (
+                state.attrs.role.history.has_changes() or state.attrs.is_banned.history.has_changes())):
+            return (obj.id,)
+    elif isinstance(obj, Professional):
+        if obj in session.new or obj in session.deleted or state.attrs.user_login_id.history.has_changes():
+            return (obj.user_login_id, *state.attrs.user_login_id.history.deleted)
+
+after_commit(
+    'invalidate cached identities',
+    _identity_writes,
+    lambda user_ids: cache.delete_many(*(_cache_key(user_id) for user_id in user_ids))
+)
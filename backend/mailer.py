@@ -0,0 +1,116 @@
+import os
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+
+SMTP_SERVER_HOST = os.environ.get('SMTP_SERVER_HOST', 'localhost')
+SMTP_SERVER_PORT = int(os.environ.get('SMTP_SERVER_PORT', 1025))
+SENDER_ADDRESS = "donotreply@homeservice.com"
+SENDER_PASSWORD = "password"
+
+
+class SMTPSession:
+    """One logged-in SMTP connection that reconnects when the server drops it."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.messages_sent = 0
+        self.smtp = self._connect()
+
+    def _connect(self):
+        transport = self.transport
+        smtp = smtplib.SMTP(transport.host, transport.port, timeout=transport.timeout)
+        smtp.login(transport.username, transport.password)
+        return smtp
+
+    def send(self, message):
+        try:
+            self.smtp.send_message(message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Idle session timed out on the server side, reconnect and retry once
+            self.close()
+            self.smtp = self._connect()
+            self.smtp.send_message(message)
+        self.messages_sent += 1
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class MailTransport:
+    """Pool of SMTP sessions shared by every sender in the process.
+
+    Sessions are opened on first use, handed back after each send and reused,
+    so a batch of messages pays for one connect + login instead of one per
+    recipient. Sessions are recycled after `max_messages` to stay under server
+    limits, and at most `pool_size` are open at once.
+    """
+
+    def __init__(self, host, port, username, password, pool_size=4, timeout=10, max_messages=100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @contextmanager
+    def session(self):
+        """Borrow a session, opening one if none is idle. Broken sessions are discarded."""
+        with self._slots:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = SMTPSession(self)
+
+            try:
+                yield session
+            except BaseException:
+                session.close()
+                raise
+
+            if session.messages_sent >= self.max_messages:
+                session.close()
+            else:
+                self._idle.put(session)
+
+    def send(self, message):
+        """Send one message, raising on failure."""
+        with self.session() as session:
+            session.send(message)
+
+    def send_many(self, messages):
+        """Send `messages` over one session and return the (message, error) pairs that failed.
+
+        A refused recipient doesn't stop the rest of the batch.
+        """
+        failures = []
+        with self.session() as session:
+            for message in messages:
+                try:
+                    session.send(message)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    failures.append((message, e))
+        return failures
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+mail_transport = MailTransport(
+    SMTP_SERVER_HOST,
+    SMTP_SERVER_PORT,
+    SENDER_ADDRESS,
+    SENDER_PASSWORD,
+    pool_size=int(os.environ.get('SMTP_POOL_SIZE', 4))
+)
@@ -0,0 +1,64 @@
+"""One Redis connection pool per process, shared by everything that talks to Redis.
+
+The OTP store, rate limits, rejection tracking, the serviceability index and
+Flask-Caching all borrow connections from the same bounded pool. Once
+`REDIS_MAX_CONNECTIONS` are in use, callers wait up to `REDIS_POOL_TIMEOUT`
+for one to be handed back instead of opening more and running Redis into
+`maxclients`. Connections idle for longer than `REDIS_HEALTH_CHECK_INTERVAL`
+are pinged before reuse, so ones dropped by the server are replaced instead
+of failing a request.
+
+The pool is only created on first use, after the environment is loaded;
+redis-py resets it in forked worker processes. Responses are bytes, as
+Flask-Caching stores pickled values, so callers decode strings themselves.
+"""
+import os
+
+import redis
+
+_pool = None
+
+
+def redis_pool():
+    global _pool
+    if _pool is None:
+        _pool = redis.BlockingConnectionPool(
+            host=os.environ.get('REDIS_HOST', 'redis'),
+            port=int(os.environ.get('REDIS_PORT', 6379)),
+            db=int(os.environ.get('REDIS_DB', 1)),
+            max_connections=int(os.environ.get('REDIS_MAX_CONNECTIONS', 20)),
+            timeout=float(os.environ.get('REDIS_POOL_TIMEOUT', 5)),
+            socket_timeout=float(os.environ.get('REDIS_SOCKET_TIMEOUT', 5)),
+            socket_connect_timeout=float(os.environ.get('REDIS_CONNECT_TIMEOUT', 2)),
+            socket_keepalive=True,
+            health_check_interval=int(os.environ.get('REDIS_HEALTH_CHECK_INTERVAL', 30))
+        )
+    return _pool
+
+def pool_stats():
+    """Connection counts of this process's pool, for monitoring."""
+    pool = redis_pool()
+    # Free slots are held as None in the queue, idle connections as themselves
+    idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+    created = len(pool._connections)
+    return {
+        'max_connections': pool.max_connections,
+        'created': created,
+        'in_use': created - idle,
+        'idle': idle,
+    }
+
+
+class SharedRedis:
+    """A redis.Redis client over the shared pool, created on first use."""
+
+    def __init__(self):
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = redis.Redis(connection_pool=redis_pool())
+        return getattr(self._client, name)
+
+
+redis_client = SharedRedis()
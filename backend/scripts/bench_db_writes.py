@@ -0,0 +1,121 @@
+"""Write throughput of the database engine configurations under concurrent writers.
+
+Starts `--writers` processes, as gunicorn workers and Celery workers would be,
+that each commit `--writes` booking-shaped transactions: a new address, a
+service request, and an increment of the shared `service_stats` counter row
+that every booking contends on. Reports committed transactions per second
+and how many failed with "database is locked".
+
+Modes:
+
+- sqlite-default: a SQLite file with the driver's default journal (no pragmas);
+- sqlite-wal: the same with the pragmas the app sets (`sqlite_pragmas`);
+- postgresql: the database at `--postgres`, with the app's pool options. It
+  must be a scratch database: the tables are created there if missing, and
+  the script refuses to write into one that already holds users.
+
+    cd backend
+    python scripts/bench_db_writes.py --writers 8 --writes 200
+    python scripts/bench_db_writes.py --postgres postgresql://localhost/hsa_bench
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from database.engine import engine_options, sqlite_pragmas, configure_engine
+from database.models import db, UserLogin, UserAddress, Category, Services, ServiceRequest, ServiceStats
+
+
+def make_engine(uri, pragmas):
+    engine = create_engine(uri, **engine_options(uri))
+    configure_engine(engine, pragmas)
+    return engine
+
+def prepare(uri, pragmas):
+    """Create the tables and the rows every booking points at."""
+    engine = make_engine(uri, pragmas)
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(UserLogin.__table__)).scalar():
+            raise SystemExit(f'{engine.url.render_as_string()} already has users, use a scratch database')
+        connection.execute(insert(UserLogin.__table__).values(id=1, name='Bench', email='bench@example.com'))
+        connection.execute(insert(Category.__table__).values(id=1, name='Bench'))
+        connection.execute(insert(Services.__table__).values(
+            id=1, name='Bench', description='Bench', base_price=100, time_required=1, category_id=1
+        ))
+        connection.execute(insert(ServiceStats.__table__).values(id=1))
+    engine.dispose()
+
+
+def writer(uri, pragmas, writes, barrier, results):
+    engine = make_engine(uri, pragmas)
+    committed = locked = 0
+    barrier.wait()
+    started = time.perf_counter()
+    for _ in range(writes):
+        try:
+            with engine.begin() as connection:
+                address_id = connection.execute(insert(UserAddress.__table__).values(
+                    user_login_id=1, street='MG Road', city='Bengaluru', state='Karnataka', zip_code='560001'
+                )).inserted_primary_key[0]
+                connection.execute(insert(ServiceRequest.__table__).values(
+                    service_id=1, customer_id=1, address_id=address_id, status='pending',
+                    date_of_request=datetime.now(timezone.utc)
+                ))
+                connection.execute(update(ServiceStats.__table__).where(ServiceStats.id == 1).values(
+                    total_requests=ServiceStats.total_requests + 1
+                ))
+            committed += 1
+        except OperationalError as e:
+            if 'locked' not in str(e):
+                raise
+            locked += 1
+    results.put((started, time.perf_counter(), committed, locked))
+    engine.dispose()
+
+def run(mode, uri, pragmas, writers, writes):
+    prepare(uri, pragmas)
+    barrier = multiprocessing.Barrier(writers)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=writer, args=(uri, pragmas, writes, barrier, results))
+        for _ in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    elapsed = max(end for _, end, _, _ in outcomes) - min(start for start, _, _, _ in outcomes)
+    committed = sum(outcome[2] for outcome in outcomes)
+    locked = sum(outcome[3] for outcome in outcomes)
+    print(f'{mode:15} {committed / elapsed:8.0f} tx/s  {committed} committed, {locked} locked, {elapsed:.2f} s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--writers', type=int, default=8, help='concurrent writer processes')
+    parser.add_argument('--writes', type=int, default=200, help='transactions per writer')
+    parser.add_argument('--postgres', help='URL of a scratch PostgreSQL database to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Without pragmas the driver's connect timeout is the only wait on a locked database
+        run('sqlite-default', f'sqlite:///{directory}/default.sqlite3', {}, args.writers, args.writes)
+        run('sqlite-wal', f'sqlite:///{directory}/wal.sqlite3', sqlite_pragmas(), args.writers, args.writes)
+    if args.postgres:
+        run('postgresql', args.postgres, {}, args.writers, args.writes)
+
+
+if __name__ == '__main__':
+    main()
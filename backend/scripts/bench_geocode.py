@@ -0,0 +1,133 @@
+"""Hit rate and latency of reverse geocoding against a local stand-in for Ola Maps.
+
+Starts a stub HTTP server that answers like the reverse-geocode API after
+`--upstream-latency` seconds and counts the calls it gets, then runs
+`--lookups` lookups from `--threads` threads. Coordinates are scattered
+around `--spots` busy places, as customers around the same neighbourhoods
+would send them. Two modes:
+
+- direct: a bare `requests.get` per lookup, as /get-location did before;
+- cached: `geocode.reverse_geocode`, cached per geohash cell in Redis with
+  concurrent misses coalesced.
+
+Reports the cache hit rate (lookups that didn't reach the stub), p50/p99
+latency and lookups per second. The cached mode needs the Redis configured
+by `REDIS_HOST`/`REDIS_PORT`/`REDIS_DB` (point `REDIS_DB` at a scratch
+database); the cells it touches are cleared first, so each run starts cold.
+
+    cd backend
+    python scripts/bench_geocode.py --lookups 2000 --threads 16 --upstream-latency 0.08
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import requests
+
+import geocode
+from utils import redis_client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    calls = 0
+    latency = 0.0
+    _lock = threading.Lock()
+
+    def do_GET(self):
+        with StubHandler._lock:
+            StubHandler.calls += 1
+        time.sleep(StubHandler.latency)
+        body = json.dumps({'status': 'ok', 'results': [{'formatted_address': 'MG Road, Bengaluru'}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 makes bursts of connections wait a second for a SYN retry
+    request_queue_size = 128
+
+
+def workload(lookups, spots, seed):
+    """Coordinates within ~100m of one of `spots` places around Bengaluru, busier places more often."""
+    rng = random.Random(seed)
+    places = [(12.9716 + rng.uniform(-0.2, 0.2), 77.5946 + rng.uniform(-0.2, 0.2)) for _ in range(spots)]
+    weights = [1 / rank for rank in range(1, spots + 1)]
+    return [
+        (latitude + rng.uniform(-0.0009, 0.0009), longitude + rng.uniform(-0.0009, 0.0009))
+        for latitude, longitude in rng.choices(places, weights, k=lookups)
+    ]
+
+def lookup_direct(latitude, longitude):
+    response = requests.get(geocode.REVERSE_GEOCODE_URL, params={'latlng': f'{latitude},{longitude}', 'api_key': 'bench'})
+    response.raise_for_status()
+    return response.json()
+
+def lookup_cached(latitude, longitude):
+    return geocode.reverse_geocode(latitude, longitude, 'bench')
+
+def run(name, lookup, coordinates, threads):
+    def timed(coordinate):
+        started = time.perf_counter()
+        lookup(*coordinate)
+        return time.perf_counter() - started
+
+    calls = StubHandler.calls
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        latencies = sorted(executor.map(timed, coordinates))
+    elapsed = time.perf_counter() - started
+
+    upstream = StubHandler.calls - calls
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'{name:7} hit rate {1 - upstream / len(coordinates):6.1%}  p50 {p50 * 1000:7.1f} ms  '
+          f'p99 {p99 * 1000:7.1f} ms  {len(coordinates) / elapsed:7.0f} lookups/s  ({upstream} upstream calls)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16, help='concurrent /get-location callers')
+    parser.add_argument('--spots', type=int, default=50, help='busy places the coordinates cluster around')
+    parser.add_argument('--upstream-latency', type=float, default=0.08, help='seconds the stub takes to answer')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    StubHandler.latency = args.upstream_latency
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    geocode.REVERSE_GEOCODE_URL = f'http://127.0.0.1:{server.server_address[1]}/places/v1/reverse-geocode'
+
+    coordinates = workload(args.lookups, args.spots, args.seed)
+    cells = {geocode.geohash(latitude, longitude) for latitude, longitude in coordinates}
+    redis_client.delete(*(f'geocode:{cell}' for cell in cells), *(f'geocode:lock:{cell}' for cell in cells))
+    print(f'{len(coordinates)} lookups over {len(cells)} geohash cells of precision {geocode.GEOCODE_PRECISION}')
+
+    try:
+        run('direct', lookup_direct, coordinates, args.threads)
+        run('cached', lookup_cached, coordinates, args.threads)
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Mail throughput against a local SMTP stand-in, with and without the pooled transport.
+
+Starts an aiosmtpd server on localhost that accepts any login and discards
+the messages, then sends `--messages` OTP-sized emails three ways:
+
+- per-message: a new connection, login and quit for every message, as the
+  senders did before `mailer.MailTransport`;
+- pooled: `MailTransport.send` per message from `--threads` threads;
+- batch: `MailTransport.send_many`, one sender over one session.
+
+`--latency` adds a delay to every server reply, to approach a remote server.
+
+    pip install aiosmtpd
+    cd backend
+    python scripts/bench_smtp.py --messages 500 --latency 0.002
+"""
+import argparse
+import asyncio
+import logging
+import os
+import smtplib
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult, SMTP
+
+from mailer import MailTransport, SENDER_ADDRESS, SENDER_PASSWORD
+
+# aiosmtpd logs a deprecation warning about its own use of a field on every login
+logging.getLogger('mail.log').setLevel(logging.ERROR)
+
+
+class DiscardHandler:
+    def __init__(self, latency):
+        self.latency = latency
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return '250 OK'
+
+
+class SlowSMTP(SMTP):
+    """Delays every reply by the handler's latency."""
+
+    async def push(self, status):
+        if self.event_handler.latency:
+            await asyncio.sleep(self.event_handler.latency)
+        await super().push(status)
+
+
+class LocalController(Controller):
+    def factory(self):
+        return SlowSMTP(
+            self.handler,
+            authenticator=lambda server, session, envelope, mechanism, auth_data: AuthResult(success=True),
+            auth_require_tls=False
+        )
+
+
+def free_port():
+    # The controller connects to its own port on start, so it needs a real one up front
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def otp_message(number):
+    message = EmailMessage()
+    message['Subject'] = 'Your verification code'
+    message['From'] = SENDER_ADDRESS
+    message['To'] = f'user{number}@example.com'
+    message.set_content(f'Your verification code is {number:06d}. It expires in 10 minutes.')
+    return message
+
+def send_per_message(host, port, messages, threads):
+    def send(message):
+        with smtplib.SMTP(host, port, timeout=10) as smtp:
+            smtp.login(SENDER_ADDRESS, SENDER_PASSWORD)
+            smtp.send_message(message)
+
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(send, messages))
+
+def send_pooled(host, port, messages, threads):
+    transport = MailTransport(host, port, SENDER_ADDRESS, SENDER_PASSWORD, pool_size=threads)
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(transport.send, messages))
+    transport.close()
+
+def send_batch(host, port, messages, threads):
+    transport = MailTransport(host, port, SENDER_ADDRESS, SENDER_PASSWORD, max_messages=len(messages))
+    failures = transport.send_many(messages)
+    transport.close()
+    assert not failures, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=4, help='concurrent senders, and pool size')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every server reply')
+    args = parser.parse_args()
+
+    handler = DiscardHandler(args.latency)
+    host, port = '127.0.0.1', free_port()
+    controller = LocalController(handler, hostname=host, port=port)
+    controller.start()
+    try:
+        for name, send in (('per-message', send_per_message), ('pooled', send_pooled), ('batch', send_batch)):
+            messages = [otp_message(number) for number in range(args.messages)]
+            received = handler.received
+            started = time.perf_counter()
+            send(host, port, messages, args.threads)
+            elapsed = time.perf_counter() - started
+            assert handler.received - received == len(messages)
+            print(f'{name:12} {len(messages) / elapsed:8.0f} messages/s  ({elapsed:.2f} s)')
+    finally:
+        controller.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Cold-start cost of the web and worker entry points.
+
+Each run starts a fresh interpreter, so nothing is shared between runs:
+
+- import time: `python -X importtime -c "import <module>"`, the cumulative
+  import time of the entry point module and its slowest imports;
+- web: time from interpreter start to the first response of the test client,
+  `create_app()` included;
+- worker: time to import `worker`, which builds the app without views, and
+  the task modules a worker loads before taking tasks.
+
+Neither touches Redis or the database, both are only connected on first use.
+Timings vary by tens of milliseconds between runs; the number of modules each
+entry point loads, printed with them, doesn't.
+
+    cd backend
+    python scripts/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Print the seconds from just before the imports, then the number of modules loaded
+FIRST_REQUEST = """
+import sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+response = app.test_client().get('/assets/services/missing.jpg')
+assert response.status_code == 404, response.status_code
+print(time.perf_counter() - started, len(sys.modules))
+"""
+
+WORKER_READY = """
+import sys, time
+started = time.perf_counter()
+import worker
+worker.celery.loader.import_default_modules()
+print(time.perf_counter() - started, len(sys.modules))
+"""
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def run_python(args):
+    result = subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return result.stdout, result.stderr
+
+def import_times(module):
+    """(cumulative µs of `module`, [(cumulative µs, name) of its direct imports], slowest first)."""
+    _, stderr = run_python(['-X', 'importtime', '-c', f'import {module}'])
+    # Lines come in completion order, a module after its imports, indented one level deeper
+    children = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if depth == 1:
+            if name == module:
+                return cumulative, sorted(children, reverse=True)
+            children = []
+        elif depth == 3:
+            children.append((cumulative, name))
+    raise RuntimeError(f'{module} not found in the import time report')
+
+def timed(snippet, runs):
+    """(seconds of each run, modules loaded); the module count doesn't vary between runs."""
+    results = [run_python(['-c', snippet])[0].strip().splitlines()[-1].split() for _ in range(runs)]
+    return [float(seconds) for seconds, _ in results], int(results[0][1])
+
+def describe(seconds):
+    return (f'median {statistics.median(seconds) * 1000:.0f} ms, '
+            f'min {min(seconds) * 1000:.0f} ms, max {max(seconds) * 1000:.0f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list per entry point')
+    args = parser.parse_args()
+
+    for module in ('app', 'worker'):
+        totals = []
+        for _ in range(args.runs):
+            total, slowest = import_times(module)
+            totals.append(total / 1e6)
+        print(f'import {module}: {describe(totals)}')
+        for cumulative, name in slowest[:args.top]:
+            print(f'    {cumulative / 1000:8.1f} ms  {name}')
+
+    for name, snippet in (('web, first response', FIRST_REQUEST), ('worker, tasks loaded', WORKER_READY)):
+        seconds, modules = timed(snippet, args.runs)
+        print(f'{name}: {describe(seconds)}, {modules} modules')
+
+
+if __name__ == '__main__':
+    main()
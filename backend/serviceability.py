@@ -0,0 +1,194 @@
+"""Serviceability index: which approved professionals serve a (category, pincode).
+
+Each area is a Redis set of professional IDs, so counting the professionals in
+an area is a single O(1) SCARD instead of a three-table join. The sets are kept
+current by an after-commit hook: any committed change to a professional's approval or
+category, its user's ban status or its professional address re-syncs that
+professional. `rebuild_index` recreates everything from the database.
+
+If the index is missing (e.g. after Redis lost its data), the first caller
+rebuilds it under a lock while concurrent callers answer from the database
+instead of each rebuilding it again.
+"""
+import uuid
+
+from sqlalchemy import select
+
+from commit_hooks import after_commit
+from database.models import db, Professional, UserLogin, UserAddress
+from utils import redis_client
+
+READY_KEY = 'serviceability:ready'
+# Outside the serviceability: prefix, which a rebuild deletes
+REBUILD_LOCK_KEY = 'lock:serviceability:rebuild'
+REBUILD_LOCK_TIMEOUT = 5 * 60
+
+
+def area_key(category_id, zip_code):
+    return f'serviceability:area:{category_id}:{zip_code}'
+
+def membership_key(professional_id):
+    return f'serviceability:professional:{professional_id}'
+
+
+def professional_count(category_id, zip_code):
+    """Number of approved, unbanned professionals serving the area."""
+    pipe = redis_client.pipeline()
+    pipe.exists(READY_KEY)
+    pipe.scard(area_key(category_id, zip_code))
+    ready, count = pipe.execute()
+
+    if not ready:
+        if not _rebuild_missing_index():
+            return len(_serving_from_db([(category_id, zip_code)])[(category_id, zip_code)])
+        count = redis_client.scard(area_key(category_id, zip_code))
+    return count
+
+def professional_counts(category_ids, zip_code):
+    """`professional_count` for several categories in a single Redis round trip."""
+    counts = area_counts((category_id, zip_code) for category_id in category_ids)
+    return {category_id: count for (category_id, _), count in counts.items()}
+
+def area_counts(areas):
+    """`professional_count` for several (category_id, zip_code) areas in a single Redis round trip."""
+    areas = list(dict.fromkeys(areas))
+    pipe = redis_client.pipeline()
+    pipe.exists(READY_KEY)
+    for category_id, zip_code in areas:
+        pipe.scard(area_key(category_id, zip_code))
+    ready, *counts = pipe.execute()
+
+    if not ready:
+        if not _rebuild_missing_index():
+            return {area: len(ids) for area, ids in _serving_from_db(areas).items()}
+        return area_counts(areas)
+    return dict(zip(areas, counts))
+
+def professional_ids(category_id, zip_code):
+    if not redis_client.exists(READY_KEY) and not _rebuild_missing_index():
+        return _serving_from_db([(category_id, zip_code)])[(category_id, zip_code)]
+    return {int(professional_id) for professional_id in redis_client.smembers(area_key(category_id, zip_code))}
+
+
+def _serving_areas_query():
+    """(professional_id, category_id, zip_code) for every professional that can take requests."""
+    return select(
+        Professional.id,
+        Professional.category_id,
+        UserAddress.zip_code
+    ).join(
+        UserLogin, UserLogin.id == Professional.user_login_id
+    ).join(
+        UserAddress, UserAddress.user_login_id == UserLogin.id
+    ).where(
+        Professional.is_approved == True,
+        UserLogin.is_banned.isnot(True),
+        UserAddress.address_type == 'professional'
+    )
+
+def _serving_from_db(areas):
+    """Serving professional IDs per (category_id, zip_code), queried directly while the index is rebuilt."""
+    serving = {area: set() for area in areas}
+    query = _serving_areas_query().where(
+        Professional.category_id.in_({category_id for category_id, _ in serving}),
+        UserAddress.zip_code.in_({zip_code for _, zip_code in serving})
+    )
+    with db.engine.connect() as connection:
+        for professional_id, category_id, zip_code in connection.execute(query):
+            if (category_id, zip_code) in serving:
+                serving[(category_id, zip_code)].add(professional_id)
+    return serving
+
+def _rebuild_missing_index():
+    """Rebuild the missing index unless another caller already is; returns whether it is ready."""
+    token = uuid.uuid4().hex
+    if not redis_client.set(REBUILD_LOCK_KEY, token, nx=True, ex=REBUILD_LOCK_TIMEOUT):
+        return False
+
+    try:
+        # The previous lock holder may have finished between our check and taking the lock
+        if not redis_client.exists(READY_KEY):
+            rebuild_index()
+        return True
+    finally:
+        if redis_client.get(REBUILD_LOCK_KEY) == token.encode():
+            redis_client.delete(REBUILD_LOCK_KEY)
+
+def rebuild_index():
+    """Recreate every area set from the database in one atomic Redis transaction."""
+    with db.engine.connect() as connection:
+        rows = connection.execute(_serving_areas_query()).all()
+
+    pipe = redis_client.pipeline(transaction=True)
+    for key in redis_client.scan_iter('serviceability:*'):
+        pipe.delete(key)
+    for professional_id, category_id, zip_code in rows:
+        key = area_key(category_id, zip_code)
+        pipe.sadd(key, professional_id)
+        pipe.sadd(membership_key(professional_id), key)
+    pipe.set(READY_KEY, 1)
+    pipe.execute()
+
+    return len(rows)
+
+def sync_professionals(professional_ids=(), user_login_ids=()):
+    """Move the given professionals into the areas they currently serve."""
+    if not professional_ids and not user_login_ids:
+        return
+
+    with db.engine.connect() as connection:
+        professionals = connection.execute(
+            select(Professional.id).where(
+                Professional.id.in_(professional_ids) | Professional.user_login_id.in_(user_login_ids)
+            )
+        ).scalars().all()
+        serving = connection.execute(
+            _serving_areas_query().where(Professional.id.in_(professionals))
+        ).all()
+
+    # Professionals deleted in the meantime only need their old memberships dropped
+    professionals = set(professionals) | set(professional_ids)
+    current = {professional_id: set() for professional_id in professionals}
+    for professional_id, category_id, zip_code in serving:
+        current[professional_id].add(area_key(category_id, zip_code))
+
+    pipe = redis_client.pipeline(transaction=True)
+    for professional_id, keys in current.items():
+        previous = {key.decode() for key in redis_client.smembers(membership_key(professional_id))}
+        for key in previous - keys:
+            pipe.srem(key, professional_id)
+        for key in keys:
+            pipe.sadd(key, professional_id)
+        pipe.delete(membership_key(professional_id))
+        if keys:
+            pipe.sadd(membership_key(professional_id), *keys)
+    pipe.execute()
+
+
+# Professionals whose serving areas a committed write may have moved, by profile or by user
+def _changed(obj, *attributes):
+    state = db.inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+def _serviceability_writes(session, obj):
+    is_new_or_deleted = obj in session.new or obj in session.deleted
+
+    if isinstance(obj, Professional):
+        if is_new_or_deleted or _changed(obj, 'is_approved', 'category_id', 'user_login_id'):
+            return (('professional', obj.id),)
+    elif isinstance(obj, UserLogin):
+        if not is_new_or_deleted and _changed(obj, 'is_banned'):
+            return (('user', obj.id),)
+    elif isinstance(obj, UserAddress):
+        if obj.address_type == 'professional' and (
+                is_new_or_deleted or _changed(obj, 'zip_code', 'user_login_id')):
+            return (('user', obj.user_login_id),)
+
+def _sync_written(keys):
+    sync_professionals(
+        {key for kind, key in keys if kind == 'professional'},
+        {key for kind, key in keys if kind == 'user'}
+    )
+
+# The commit already happened when this fails; a later rebuild repairs the index
+after_commit('update serviceability index', _serviceability_writes, _sync_written)
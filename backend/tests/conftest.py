@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend modules the way the app does, from the backend directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The web app over an empty SQLite database with every declared table and index."""
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "test.sqlite3"}')
+
+    from app import create_app
+    from database.models import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
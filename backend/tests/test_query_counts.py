@@ -0,0 +1,125 @@
+"""Booking listings must load in a fixed number of queries, whatever the number of rows."""
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from database.models import db, UserLogin, UserAddress, Category, Services, Professional, ServiceRequest
+
+CUSTOMER_ID, PROFESSIONAL_USER_ID, PROFESSIONAL_ID = 1, 2, 1
+
+
+@pytest.fixture
+def seeded(app):
+    # Core inserts: the ORM session hooks would reach for Redis
+    db.session.execute(UserLogin.__table__.insert(), [
+        {'id': CUSTOMER_ID, 'name': 'Customer', 'email': 'customer@example.com', 'role': 'user'},
+        {'id': PROFESSIONAL_USER_ID, 'name': 'Professional', 'email': 'pro@example.com', 'role': 'professional'},
+    ])
+    db.session.execute(UserAddress.__table__.insert(), [
+        {'id': user_id, 'user_login_id': user_id, 'street': 'MG Road', 'city': 'Bengaluru',
+         'state': 'Karnataka', 'zip_code': '560001'}
+        for user_id in (CUSTOMER_ID, PROFESSIONAL_USER_ID)
+    ])
+    db.session.execute(Category.__table__.insert(), [{'id': 1, 'name': 'Cleaning'}])
+    db.session.execute(Services.__table__.insert(), [
+        {'id': 1, 'name': 'Deep cleaning', 'description': 'Whole home', 'base_price': 1000,
+         'time_required': 4, 'category_id': 1},
+    ])
+    db.session.execute(Professional.__table__.insert(), [
+        {'id': PROFESSIONAL_ID, 'user_login_id': PROFESSIONAL_USER_ID, 'category_id': 1,
+         'experience': 3, 'is_approved': True},
+    ])
+    db.session.commit()
+    return app
+
+def insert(model, **values):
+    return db.session.execute(model.__table__.insert().values(**values)).inserted_primary_key[0]
+
+def add_bookings(copies, customer_id=None, professional_id=None):
+    """`copies` pending, accepted and completed requests.
+
+    Each copy gets its own service and address, and a new customer or
+    professional unless one is given, so lazy loads can't hide behind the
+    identity map.
+    """
+    now = datetime.now(timezone.utc)
+    rows = []
+    for _ in range(copies):
+        number = db.session.query(db.func.count(UserLogin.id)).scalar() + 1
+        customer = customer_id or insert(UserLogin, name=f'Customer {number}', email=f'customer{number}@example.com')
+        professional = professional_id or insert(
+            Professional, category_id=1, experience=1, is_approved=True,
+            user_login_id=insert(UserLogin, name=f'Professional {number}', email=f'pro{number}@example.com',
+                                 role='professional')
+        )
+        common = {
+            'customer_id': customer,
+            'service_id': insert(Services, name=f'Service {number}', description='Whole home', base_price=1000,
+                                 time_required=4, category_id=1),
+            'address_id': insert(UserAddress, user_login_id=customer, street='MG Road', city='Bengaluru',
+                                 state='Karnataka', zip_code='560001'),
+            'date_of_request': now,
+            'total_amount': 1000,
+        }
+        rows += [
+            dict(common, status='pending', professional_id=None),
+            dict(common, status='accepted', professional_id=professional),
+            dict(common, status='completed', professional_id=professional, rating=5, review='Great',
+                 date_of_completion=now),
+        ]
+    db.session.execute(ServiceRequest.__table__.insert(), rows)
+    db.session.commit()
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def queries_for(client, url, user_id, claims):
+    with client.application.test_request_context():
+        token = create_access_token(identity=user_id, additional_claims=claims)
+    with count_queries() as statements:
+        response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+def test_customer_bookings_query_count(seeded):
+    client = seeded.test_client()
+    claims = {'role': 'user', 'is_banned': False, 'professional_id': None}
+
+    add_bookings(1, customer_id=CUSTOMER_ID)
+    few, bookings = queries_for(client, '/api/bookings/get_bookings', CUSTOMER_ID, claims)
+    assert len(bookings) == 3
+
+    add_bookings(10, customer_id=CUSTOMER_ID)
+    many, bookings = queries_for(client, '/api/bookings/get_bookings', CUSTOMER_ID, claims)
+    assert len(bookings) == 33
+    assert many == few
+
+@pytest.mark.parametrize('booking_type', ['pending_request', 'accepted_request', 'past_request'])
+def test_professional_bookings_query_count(seeded, booking_type):
+    client = seeded.test_client()
+    claims = {'role': 'professional', 'is_banned': False, 'professional_id': PROFESSIONAL_ID}
+    url = f'/api/professionals/bookings?type={booking_type}'
+
+    add_bookings(1, professional_id=PROFESSIONAL_ID)
+    few, bookings = queries_for(client, url, PROFESSIONAL_USER_ID, claims)
+    assert len(bookings[booking_type]) == 1
+
+    add_bookings(10, professional_id=PROFESSIONAL_ID)
+    many, bookings = queries_for(client, url, PROFESSIONAL_USER_ID, claims)
+    assert len(bookings[booking_type]) == 11
+    assert many == few
@@ -0,0 +1,91 @@
+"""Hot queries must reach service_requests through an index, never by scanning the whole table."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func
+
+from database.models import db, ServiceRequest, Services, Professional, UserAddress, UserLogin
+from serviceability import _serving_areas_query
+
+
+NOW = datetime.now(timezone.utc)
+
+# Built inside the app context, as the queries they mirror are
+HOT_QUERIES = {
+    # endpoints/bookings.py get_bookings
+    'customer bookings': lambda: ServiceRequest.query.filter_by(customer_id=1).order_by(ServiceRequest.id.desc()),
+    # endpoints/professional.py get_professional_bookings
+    'professional accepted bookings': lambda: ServiceRequest.query.filter(
+        ServiceRequest.status == 'accepted',
+        ServiceRequest.professional_id == 1
+    ).order_by(ServiceRequest.id.desc()),
+    'professional past bookings': lambda: ServiceRequest.query.filter(
+        ServiceRequest.status.notin_(['pending', 'accepted']),
+        ServiceRequest.professional_id == 1
+    ).order_by(ServiceRequest.id.desc()),
+    'pending requests in an area': lambda: ServiceRequest.query.filter(
+        ServiceRequest.status == 'pending',
+        ServiceRequest.address.has(zip_code='560001'),
+        ServiceRequest.service.has(category_id=1)
+    ).order_by(ServiceRequest.id.desc()),
+    # Professional dashboard and admin professional detail counts
+    'requests of a professional': lambda: db.session.query(func.count(ServiceRequest.id)).filter(
+        ServiceRequest.professional_id == 1,
+        ServiceRequest.status == 'completed'
+    ),
+    # endpoints/admin.py reviews of a professional
+    'reviews of a professional': lambda: ServiceRequest.query.filter_by(professional_id=1).order_by(ServiceRequest.id.desc()),
+    # Admin counts by status and date range
+    'requests by status': lambda: db.session.query(func.count(ServiceRequest.id)).filter(ServiceRequest.status == 'requested'),
+    'requests created in a range': lambda: ServiceRequest.query.filter(
+        ServiceRequest.created_at >= NOW - timedelta(days=7),
+        ServiceRequest.created_at < NOW
+    ),
+    # celery_task.py check_expired_service_requests
+    'stale pending requests': lambda: db.session.query(
+        ServiceRequest.id, Services.category_id, UserAddress.zip_code
+    ).join(
+        Services, Services.id == ServiceRequest.service_id
+    ).join(
+        UserAddress, UserAddress.id == ServiceRequest.address_id
+    ).filter(
+        ServiceRequest.status == 'pending',
+        ServiceRequest.date_of_request < NOW - timedelta(hours=24),
+        ServiceRequest.id > 0
+    ).order_by(ServiceRequest.id),
+    # celery_task.py send_daily_professional_reminders
+    'accepted requests for reminders': lambda: db.session.query(
+        ServiceRequest.professional_id, UserLogin.email, Services.name
+    ).join(
+        Professional, Professional.id == ServiceRequest.professional_id
+    ).join(
+        UserLogin, UserLogin.id == Professional.user_login_id
+    ).join(
+        Services, Services.id == ServiceRequest.service_id
+    ).filter(ServiceRequest.status == 'accepted'),
+    # serviceability.py: professionals serving an area
+    'professionals serving an area': lambda: _serving_areas_query().where(
+        Professional.category_id == 1,
+        UserAddress.zip_code == '560001'
+    ),
+}
+
+
+def query_plan(query):
+    statement = getattr(query, 'statement', query)
+    # Expand IN lists into one placeholder per value, as they are when executed
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    # Values don't change the plan, only their presence does
+    params = tuple(
+        value.isoformat() if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    with db.engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)]
+
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_an_index(app, name):
+    plan = query_plan(HOT_QUERIES[name]())
+    scans = [step for step in plan if step.startswith('SCAN service_requests')]
+    assert not scans, f'{name} scans service_requests: {plan}'
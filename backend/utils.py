@@ -1,15 +1,64 @@
-import redis
 import random
 import string
-import smtplib
 import  os
-import uuid
+import hashlib
+import tempfile
+import base64
+from datetime import date, datetime, timedelta, timezone
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer
 from werkzeug.utils import secure_filename
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
-# Redis setup
-redis_client = redis.Redis(host=os.environ.get('REDIS_HOST', 'redis'), port=int(os.environ.get('REDIS_PORT', 6379)), db=1, decode_responses=True)
+from redis.commands.core import Script
+
+from asset_urls import upload_path
+from mailer import mail_transport, SENDER_ADDRESS
+from redis_pool import redis_client
+
+OTP_TTL = 600
+
+# Token buckets limiting OTP requests: (capacity, seconds to refill one token)
+OTP_EMAIL_LIMIT = (int(os.environ.get('OTP_EMAIL_LIMIT', 3)), int(os.environ.get('OTP_EMAIL_REFILL_SECONDS', 120)))
+OTP_IP_LIMIT = (int(os.environ.get('OTP_IP_LIMIT', 10)), int(os.environ.get('OTP_IP_REFILL_SECONDS', 30)))
+
+# Refill the bucket for the time elapsed, then take a token if one is left.
+# Runs atomically in Redis, so concurrent requests can't overdraw a bucket.
+# Given as bytes, so defining it doesn't create the Redis pool at import
+_TOKEN_BUCKET = Script(redis_client, b"""
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * rate)
+
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return retry_after
+""")
+
+def take_token(key, capacity, refill_seconds):
+    """Take one token from the bucket at `key`; returns 0, or the seconds until one is available."""
+    return _TOKEN_BUCKET(keys=[key], args=[capacity, 1 / refill_seconds], client=redis_client)
+
+def otp_rate_limit(email, ip_address):
+    """Seconds the caller must wait before requesting another OTP, 0 if allowed."""
+    return (
+        take_token(f'rate:otp:ip:{ip_address}', *OTP_IP_LIMIT)
+        or take_token(f'rate:otp:email:{email.lower()}', *OTP_EMAIL_LIMIT)
+    )
 
 def generate_otp(length=6):
     """Generate a random OTP."""
@@ -18,18 +67,13 @@ def generate_otp(length=6):
 def store_otp(email, otp, verification_type):
     """Store OTP in Redis with expiration."""
     redis_key = f"otp:{verification_type}:{email}"
-    redis_client.setex(redis_key, 600, otp)
+    redis_client.setex(redis_key, OTP_TTL, otp)
 
 def get_stored_otp(email, verification_type):
     """Retrieve stored OTP from Redis."""
     redis_key = f"otp:{verification_type}:{email}"
     return redis_client.get(redis_key)
 
-SMTP_SERVER_HOST = "localhost"
-SMTP_SERVER_PORT = 1025
-SENDER_ADDRESS = "donotreply@homeservice.com"
-SENDER_PASSWORD = "password"
-
 def send_otp_email(to, otp):
     msg = MIMEMultipart()
     msg['From'] = SENDER_ADDRESS
@@ -38,32 +82,140 @@ def send_otp_email(to, otp):
 
     msg.attach(MIMEText(f'Your verification code is: {otp}', 'html'))
 
-    smtp_server = smtplib.SMTP(SMTP_SERVER_HOST, SMTP_SERVER_PORT)
-    smtp_server.login(SENDER_ADDRESS, SENDER_PASSWORD)
-    smtp_server.send_message(msg)
-    smtp_server.quit()
+    mail_transport.send(msg)
+
+DASHBOARD_BUCKETS = ('day', 'week', 'month')
+DASHBOARD_DEFAULT_DAYS = 7
+DASHBOARD_MAX_DAYS = 366 * 3
+
+def parse_dashboard_range(args):
+    """(start, end, bucket) from ?start=YYYY-MM-DD&end=YYYY-MM-DD&bucket=day|week|month.
+
+    Defaults to the last seven days, including today, by day. Raises ValueError
+    on malformed or oversized ranges.
+    """
+    bucket = args.get('bucket', 'day')
+    if bucket not in DASHBOARD_BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(DASHBOARD_BUCKETS)}")
+
+    try:
+        end = date.fromisoformat(args['end']) if args.get('end') else datetime.now(timezone.utc).date()
+        start = date.fromisoformat(args['start']) if args.get('start') else end - timedelta(days=DASHBOARD_DEFAULT_DAYS - 1)
+    except ValueError:
+        raise ValueError('Dates must be in YYYY-MM-DD format')
+
+    if start > end:
+        raise ValueError('start must not be after end')
+    if (end - start).days >= DASHBOARD_MAX_DAYS:
+        raise ValueError(f'Range cannot exceed {DASHBOARD_MAX_DAYS} days')
+    return start, end, bucket
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(str(value).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor from `encode_cursor`, raising ValueError if it was tampered with."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except ValueError as e:
+        # Covers bad base64, bad UTF-8 and non-integer payloads
+        raise ValueError('Invalid cursor') from e
 
-def handle_image_upload(image_file, service_id=None):
+def keyset_paginate(query, column, args, descending=True):
+    """Return one page of `query` and the cursor of the next page (None on the last page).
+
+    Pages are sliced with `column > / < cursor` on a unique, indexed integer
+    column instead of OFFSET, so deep pages cost the same as the first one.
+    Reads `limit` (`DEFAULT_PAGE_SIZE` when absent, at most `MAX_PAGE_SIZE`)
+    and `cursor` from the request `args`.
+    """
+    cursor = args.get('cursor')
+    ordering = column.desc() if descending else column.asc()
+    limit = min(max(args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    if cursor:
+        last_seen = decode_cursor(cursor)
+        query = query.filter(column < last_seen if descending else column > last_seen)
+
+    # Fetch one extra row to learn whether another page exists
+    items = query.order_by(ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(getattr(items[-1], column.key))
+    return items, next_cursor
+
+def with_next_cursor(response, next_cursor):
+    """Advertise the next page through the `X-Next-Cursor` header."""
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def _export_serializer():
+    return URLSafeTimedSerializer(current_app.config['JWT_SECRET_KEY'], salt='export-download')
+
+def export_download_token(filename):
+    """Signed token naming an export file, valid for `EXPORT_LINK_MAX_AGE` seconds."""
+    return _export_serializer().dumps(filename)
+
+def load_export_token(token):
+    """Filename behind a download token, raising itsdangerous.BadSignature if invalid or expired."""
+    return _export_serializer().loads(token, max_age=current_app.config['EXPORT_LINK_MAX_AGE'])
+
+SERVICE_IMAGE_FOLDER = 'static/uploads/services'
+SERVICE_IMAGE_VARIANT_FOLDER = f'{SERVICE_IMAGE_FOLDER}/variants'
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+class UploadTooLarge(ValueError):
+    pass
+
+def store_upload(upload, folder, max_bytes=None):
+    """Stream an uploaded file into `folder` under the SHA-256 of its content and return its path.
+
+    The file is copied in chunks, never held in memory. Identical uploads
+    map to the same file, so a duplicate costs no extra storage and is only
+    written once. Raises UploadTooLarge, leaving nothing behind, as soon as
+    more than `max_bytes` have been read.
+    """
+    file_ext = os.path.splitext(secure_filename(upload.filename))[1].lower()
+    os.makedirs(folder, exist_ok=True)
+
+    # Hash while spooling to a temporary file, the name is only known at the end
+    digest = hashlib.sha256()
+    size = 0
+    upload.stream.seek(0)
+    with tempfile.NamedTemporaryFile(dir=folder, delete=False) as tmp:
+        try:
+            for chunk in iter(lambda: upload.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes / (1024 * 1024):g}MB limit")
+                digest.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+
+    file_path = f"{folder}/{digest.hexdigest()}{file_ext}"
+    if os.path.exists(file_path):
+        os.remove(tmp.name)
+    else:
+        os.replace(tmp.name, file_path)
+    return file_path
+
+def handle_image_upload(image_file):
+    """Store an uploaded image under the SHA-256 of its content and return its path."""
     if not image_file:
         return None
         
     try:
-        upload_dir = os.path.join('static', 'uploads', 'services')
-        file_ext = os.path.splitext(secure_filename(image_file.filename))[1].lower()
-        os.makedirs(upload_dir, exist_ok=True)
-        if service_id:
-            filename = f"service_{service_id}{file_ext}"
-        else:
-            filename = f"service_{uuid.uuid4().hex[:8]}{file_ext}"
-        file_path = os.path.join(upload_dir, filename)
-        
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-        image_file.seek(0)
-        image_file.save(file_path)
-        path = os.path.relpath(file_path, start='static').replace(os.path.sep,'/')
-        return file_path
+        return store_upload(image_file, SERVICE_IMAGE_FOLDER)
         
     except Exception as e:
         print(f"Error handling image: {e}")
@@ -0,0 +1,10 @@
+"""Celery entry point: `celery -A worker worker ...` and `celery -A worker beat ...`.
+
+Builds the shared app from `app_factory`, which hands it to Celery, so a
+worker loads the models, the caches and the task modules but none of the
+endpoints.
+"""
+from app_factory import create_app
+from celery_config import celery
+
+app = create_app()
@@ -0,0 +1,19 @@
+import axios from "axios";
+
+// Rows asked for per page; the API serves at most 200
+export const PAGE_SIZE = 100;
+
+// Fetch every page of a cursor-paginated list by following X-Next-Cursor.
+// `items` picks the rows out of a response body that isn't the list itself.
+export async function fetchAllPages(url, { params = {}, items = data => data } = {}) {
+    const rows = [];
+    let cursor = null;
+    do {
+        const response = await axios.get(url, {
+            params: { ...params, limit: PAGE_SIZE, ...(cursor && { cursor }) }
+        });
+        rows.push(...items(response.data));
+        cursor = response.headers['x-next-cursor'] || null;
+    } while (cursor);
+    return rows;
+}
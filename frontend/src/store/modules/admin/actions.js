@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { fetchAllPages } from '@/plugins/pagination';
 // Dialogs actions
 const openServiceDialog = ({ commit }, service = null) => {
   commit('SET_SERVICE_DIALOG', { isOpen: true, serviceToEdit: service });
@@ -48,8 +49,7 @@ const fetchDashboardData = async ({ commit }) => {
 const fetchServices = async ({ commit }) => {
   try {
     commit('SET_SERVICES_LOADING', true)
-    const response = await axios.get('/api/services')
-    const data = await response.data
+    const data = await fetchAllPages('/api/services')
     
     commit('SET_SERVICES_LIST', data)
     return data
@@ -115,8 +115,8 @@ const fetchUsers = async ({ commit }) => {
     commit('SET_LOADING', true)
     commit('SET_ERROR', null)
     
-    const response = await axios.get('/api/admin/users')
-    commit('SET_USERS', response.data)
+    const users = await fetchAllPages('/api/admin/users')
+    commit('SET_USERS', users)
   } catch (error) {
     commit('SET_ERROR', 'Failed to fetch users')
     console.error('Error fetching users:', error.message)
@@ -175,10 +175,9 @@ const fetchProfessionalDetails = async ({ commit }, userId) => {
 }
 const fetchProfessionalReviews = async ({ commit }, userId) => {
   try {
-    const response = await axios.get(`/api/admin/professionals/${userId}/reviews`)
-    commit('SET_PROFESSIONAL_REVIEWS', response.data)
-    console.log(response.data)
-    return response.data
+    const reviews = await fetchAllPages(`/api/admin/professionals/${userId}/reviews`)
+    commit('SET_PROFESSIONAL_REVIEWS', reviews)
+    return reviews
   } catch (error) {
     console.error('Error fetching professional reviews:', error.message)
     return []
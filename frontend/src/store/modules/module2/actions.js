@@ -1,9 +1,9 @@
 import axios from 'axios';
+import { fetchAllPages } from '@/plugins/pagination';
 const fetchServices = async ({ commit }) => {
   try {
     commit('SET_SERVICES_LOADING', true)
-    const response = await axios.get('/api/services')
-    const data = await response.data
+    const data = await fetchAllPages('/api/services')
     
     commit('SET_SERVICES_LIST', data)
     return data
@@ -32,9 +32,8 @@ const fetchBookings = async ({ commit }) => {
   commit('SET_ERROR', null)
 
   try {
-      const response = await axios.get('/api/bookings/get_bookings')
-      console.log("bookings: ", response.data)
-      commit('SET_BOOKINGS', response.data)
+      const bookings = await fetchAllPages('/api/bookings/get_bookings')
+      commit('SET_BOOKINGS', bookings)
     } catch (error) {
       commit('SET_ERROR', error.response?.data?.message || 'Failed to fetch bookings')
     } finally {
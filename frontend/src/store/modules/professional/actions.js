@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { fetchAllPages } from '@/plugins/pagination';
 
 const status = async ({ commit }) => {
   try {
@@ -43,12 +44,15 @@ const fetchDashboardData = async ({ commit }) => {
 
 const get_bookings = async ({ commit }, type = 'pending_request') => {
   try {
-    const response = await axios.get(`/api/professionals/bookings?type=${type}`)
+    const bookings = await fetchAllPages('/api/professionals/bookings', {
+      params: { type },
+      items: data => data[type]
+    })
     commit('SET_BOOKINGS', { 
       type, 
-      bookings: response.data[type] 
+      bookings 
     })
-    return response.data
+    return { [type]: bookings }
   } catch (error) {
     console.error(`Error fetching ${type} bookings:`, error)
     throw error
@@ -13,6 +13,7 @@ export default defineConfig({
         target: 'http://backend:5000', // Instead of 127.0.0.1
         changeOrigin: true,
         secure: false,
+        xfwd: true, // Pass the client address on in X-Forwarded-For
       }
     }
   },